@@ -29,6 +29,13 @@ class Potd(Cog):
         self.potd_service = PotdService(bot)
         self.daily_potd_loop.start()
 
+    async def cog_load(self):
+        await self.potd_service.prefetch()
+        # Only now, so a failed journal replay is retried on top of the prefetched cache.
+        self.flush_sheets_loop.start()
+        self.poll_sheets_loop.start()
+        self.snapshot_sheets_loop.start()
+
     @Cog.listener()
     @catch_errors
     async def on_message(self, message: discord.Message):
@@ -54,6 +61,28 @@ class Potd(Cog):
         await self.potd_service.daily_problem()
         await self.logger.info("Completed daily POTD task")
 
+    @tasks.loop(seconds=config.sheet_flush_interval)
+    @catch_errors
+    async def flush_sheets_loop(self):
+        await self.potd_service.flush()
+
+    @tasks.loop(seconds=config.sheet_poll_interval)
+    @catch_errors
+    async def poll_sheets_loop(self):
+        await self.potd_service.poll_remote()
+
+    @tasks.loop(seconds=config.sheet_snapshot_interval)
+    @catch_errors
+    async def snapshot_sheets_loop(self):
+        await self.potd_service.save_snapshot()
+
+    async def cog_unload(self):
+        self.flush_sheets_loop.cancel()
+        self.poll_sheets_loop.cancel()
+        self.snapshot_sheets_loop.cancel()
+        await self.potd_service.flush()
+        await self.potd_service.save_snapshot()
+
     @Cog.listener()
     async def on_app_command_error(
         self, interaction: discord.Interaction, error: app_commands.AppCommandError
@@ -196,12 +225,10 @@ class Potd(Cog):
     @requires_permission(Permission.PROELECTRO)
     async def clear_cache(self, interaction: discord.Interaction):
         await interaction.response.defer(ephemeral=True)
-        new_potd_service = PotdService(self.bot)
-        old_potd_service = self.potd_service
-        async with new_potd_service.lock:
-            self.potd_service = new_potd_service
-            await old_potd_service.clear()
-        await interaction.followup.send("Cleared cache successfully.", ephemeral=True)
+        changed = await self.potd_service.refresh()
+        await interaction.followup.send(
+            f"Cleared cache successfully, reloaded {len(changed)} changed sheet(s).", ephemeral=True
+        )
         await self.logger.warning("Cache cleared by proelectro")
 
     @group.command(name="pending", description="Displays list of pending potd")
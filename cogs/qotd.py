@@ -27,13 +27,23 @@ class Qotd(Cog):
         self.bot.tree.on_error = self.on_app_command_error
         self.logger = Logger(bot)
         self.qotd_service = QotdService(bot)
-        hour, minute = self.qotd_service.get_time()
+        self.empty_run = datetime.now()
+        # self.update_leaderboard_hrs.start()
+
+    async def cog_load(self):
+        await self.qotd_service.prefetch()
+        # Only now, so a failed journal replay is retried on top of the prefetched cache.
+        self.flush_sheets_loop.start()
+        self.publish_leaderboard_loop.start()
+        self.persist_submissions_loop.start()
+        self.post_submissions_loop.start()
+        self.poll_sheets_loop.start()
+        self.snapshot_sheets_loop.start()
+        hour, minute = await self.qotd_service.get_time()
         print(f"QOTD posting time is set to {hour}:{minute} UTC")
         self.daily_qotd_loop.change_interval(time=time(hour, minute))
         self.daily_qotd_loop.start()
         print(f"QOTD daily loop started at {hour}:{minute} UTC")
-        self.empty_run = datetime.now()
-        # self.update_leaderboard_hrs.start()
 
     # General
 
@@ -78,12 +88,54 @@ class Qotd(Cog):
         await self.qotd_service.daily_question()
         await self.logger.info("Completed daily QOTD task")
 
+    @tasks.loop(seconds=config.sheet_flush_interval)
+    @catch_errors
+    async def flush_sheets_loop(self):
+        await self.qotd_service.flush()
+
+    @tasks.loop(seconds=config.submission_batch_interval)
+    @catch_errors
+    async def persist_submissions_loop(self):
+        await self.qotd_service.persist_submissions()
+
+    @tasks.loop(seconds=config.submission_batch_interval)
+    @catch_errors
+    async def post_submissions_loop(self):
+        await self.qotd_service.post_submissions()
+
+    @tasks.loop(seconds=config.leaderboard_publish_interval)
+    @catch_errors
+    async def publish_leaderboard_loop(self):
+        await self.qotd_service.publish_leaderboard()
+
+    @tasks.loop(seconds=config.sheet_poll_interval)
+    @catch_errors
+    async def poll_sheets_loop(self):
+        await self.qotd_service.poll_remote()
+
+    @tasks.loop(seconds=config.sheet_snapshot_interval)
+    @catch_errors
+    async def snapshot_sheets_loop(self):
+        await self.qotd_service.save_snapshot()
+
+    async def cog_unload(self):
+        self.flush_sheets_loop.cancel()
+        self.publish_leaderboard_loop.cancel()
+        self.poll_sheets_loop.cancel()
+        self.snapshot_sheets_loop.cancel()
+        self.persist_submissions_loop.cancel()
+        self.post_submissions_loop.cancel()
+        await self.qotd_service.persist_submissions()
+        await self.qotd_service.post_submissions()
+        await self.qotd_service.flush()
+        await self.qotd_service.save_snapshot()
+
     @group.command(name="start", description="To start the qotd season")
     @requires_permission(Permission.QOTD_CREATOR)
     async def start(self, interaction: discord.Interaction):
         await interaction.response.defer()
         if await self.qotd_service.start_season():
-            await interaction.followup.send(f"Started the QOTD season successfully. Will post {utils.convert_time_discord_format(*self.qotd_service.get_time())}.")
+            await interaction.followup.send(f"Started the QOTD season successfully. Will post {utils.convert_time_discord_format(*(await self.qotd_service.get_time()))}.")
         else:
             await interaction.followup.send("Qotd season is already live, end it first to start a new one.")
 
@@ -286,12 +338,10 @@ class Qotd(Cog):
     @requires_permission(Permission.PROELECTRO)
     async def clear_cache(self, interaction: discord.Interaction):
         await interaction.response.defer(ephemeral=True)
-        new_qotd_service = QotdService(self.bot)
-        old_qotd_service = self.qotd_service
-        async with new_qotd_service.lock:
-            self.qotd_service = new_qotd_service
-            await old_qotd_service.clear()
-        await interaction.followup.send("Cleared cache successfully.", ephemeral=True)
+        changed = await self.qotd_service.refresh()
+        await interaction.followup.send(
+            f"Cleared cache successfully, reloaded {len(changed)} changed sheet(s).", ephemeral=True
+        )
         await self.logger.warning("Cache cleared by proelectro")
 
     @group.command(name="pending", description="Displays list of pending qotd")
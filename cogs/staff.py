@@ -10,6 +10,7 @@ from discord.app_commands import CommandOnCooldown
 import config
 import utils.utils as utils
 from services.staff_service import StaffService
+from services.google_sheet_service import quota
 from logger import Logger
 from utils.utils import requires_permission, catch_errors, Permission, PaginatorView
 from help_cmds import cmds_staff
@@ -91,6 +92,26 @@ class Staff(Cog):
         await interaction.followup.send("Cleared cache successfully.", ephemeral=True)
         await self.logger.warning("Cache cleared by proelectro")
 
+    @group.command(
+        name="quota", description="Google Sheets quota usage and command queues. Restricted to the owner only (proelectro)."
+    )
+    @requires_permission(Permission.PROELECTRO)
+    async def quota(self, interaction: discord.Interaction):
+        usage = quota.usage()
+        lines = [
+            f"{kind}: {u['used_last_minute']}/{u['limit']:.0f} in the last minute, "
+            f"{u['available']:.1f} available, {u['queued']} queued"
+            for kind, u in usage.items()
+        ]
+        for cog_name, service_name in (("Qotd", "qotd_service"), ("Potd", "potd_service")):
+            cog = self.bot.get_cog(cog_name)
+            if cog is not None:
+                depth = getattr(cog, service_name).lock.depth()
+                lines.append(
+                    f"{cog_name} commands queued: " + ", ".join(f"{n} {priority}" for priority, n in depth.items())
+                )
+        await interaction.response.send_message("\n".join(lines), ephemeral=True)
+
 
     @group.command(
         name="help", description="Displays list and description of staff cmds"
@@ -42,8 +42,22 @@ qotd_role = 1478784307354140702
 qotd_banned = 1491326729128775740
 qotd_discussion = 1488060187259699282
 qotd_logs = 1488423859953864815
+leaderboard_publish_interval = 30  # seconds between leaderboard re-renders after solves
+submission_batch_interval = 1  # seconds between retries of /qotd submit commits and announcements
 
 # Staff
 physbot_dm_forum = 1489562646914011287
 staff_chat = 1477817938877743165
-staff_spam = 1477824376773545987
\ No newline at end of file
+staff_spam = 1477824376773545987
+
+# Sheets
+sheet_flush_interval = 5  # seconds between write-behind flushes
+sheet_poll_interval = 60  # seconds between checks for edits made in the spreadsheet
+sheet_cache_size = 128  # cached worksheets per workbook, besides the pinned ones (live and scored sheets)
+sheet_snapshot_interval = 300  # seconds between snapshots of the sheet cache
+storage_dir = "storage"  # local databases and journals
+user_name_ttl = 7 * 24 * 3600  # seconds a fetched username is reused before fetching it again
+sheets_read_quota = 60  # Sheets API requests per minute per user
+sheets_write_quota = 60
+drive_read_quota = 120  # Drive API requests per minute, only the revision checks use them
+command_queue_limits = (500, 100, 20)  # commands waiting per service: submission, command, background
@@ -78,7 +78,7 @@ qotd_cmds_creator = [
     ),
     (
         "/qotd clear_cache",
-        "Reload the QOTD cache. Owner only.",
+        "Reload the QOTD sheets edited on Google Sheets. Owner only.",
     ),
     (
         "/qotd end_season",
@@ -136,7 +136,7 @@ potd_cmds_creator = [
     ),
     (
         "/potd clear_cache",
-        "Reload the POTD cache. Owner only.",
+        "Reload the POTD sheets edited on Google Sheets. Owner only.",
     ),
     (
         "/potd check",
@@ -153,6 +153,10 @@ cmds_staff = [
         "/staff clear_cache",
         "Reload the staff cache. Owner only.",
     ),
+    (
+        "/staff quota",
+        "Show Google Sheets quota usage, queued requests and queued QOTD/POTD commands. Owner only.",
+    ),
     (
         "/message <text> [channel/user id] [reply id]",
         "Send a message through the bot.",
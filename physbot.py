@@ -1,4 +1,6 @@
+import asyncio
 import logging
+import signal
 import discord
 from discord.ext import commands
 import config
@@ -17,6 +19,15 @@ class PHODSBot(commands.Bot):
         )
         self.logger = logging.getLogger("bot")
 
+    async def setup_hook(self):
+        # Docker stops the bot with SIGTERM, close cleanly so cogs can flush pending sheet writes.
+        try:
+            asyncio.get_running_loop().add_signal_handler(
+                signal.SIGTERM, lambda: asyncio.create_task(self.close())
+            )
+        except NotImplementedError:
+            pass
+
     async def on_ready(self):
         for cog in self.config.cogs:
             try:
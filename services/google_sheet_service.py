@@ -1,13 +1,432 @@
-import gspread
+import asyncio
+import contextlib
+import fnmatch
+import gzip
+import heapq
+import itertools
+import json
+import os
 import time
+import gspread
+from collections import OrderedDict, deque
+from contextvars import ContextVar
+from enum import IntEnum
+from typing import Any, Awaitable, Callable, Iterable, Iterator, Optional
+from gspread.utils import absolute_range_name, rowcol_to_a1
+from requests.adapters import HTTPAdapter
+import config
+from services.journal import Journal
+from services.sqlite_backend import SQLiteBackend
+from services.storage_backend import Block, MirroredBackend, SheetNotFound, StorageBackend
+
+
+class Priority(IntEnum):
+    """Order in which queued Sheets requests get quota and queued commands get
+    the service lock, lowest first."""
+    SUBMISSION = 0
+    COMMAND = 1
+    BACKGROUND = 2
+
+
+_priority: ContextVar[Priority] = ContextVar("sheet_priority", default=Priority.COMMAND)
+
+
+@contextlib.contextmanager
+def sheet_priority(priority: Priority) -> Iterator[None]:
+    """Run the Sheets requests made inside the block, the commits they queue and
+    the service locks it waits for at priority."""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority() -> Priority:
+    return _priority.get()
+
+
+class TokenBucket:
+    """Requests allowed by a per-minute quota, refilled continuously."""
+
+    def __init__(self, per_minute: int) -> None:
+        self.capacity: float = per_minute
+        self.rate: float = per_minute / 60
+        self.tokens: float = self.capacity
+        self._updated: float = time.monotonic()
+        # Times of the requests granted during the last minute.
+        self._granted: deque[float] = deque()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        while self._granted and self._granted[0] <= now - 60:
+            self._granted.popleft()
+
+    def try_take(self) -> bool:
+        self._refill()
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        self._granted.append(self._updated)
+        return True
+
+    def wait_time(self) -> float:
+        """Seconds until the next token is available."""
+        self._refill()
+        return max(0.0, (1 - self.tokens) / self.rate)
+
+    def hold(self, seconds: float) -> None:
+        """Grant nothing for the next seconds, used when the API says the quota ran out."""
+        self._refill()
+        self.tokens = min(self.tokens, 0.0) - seconds * self.rate
+
+    def used_last_minute(self) -> int:
+        self._refill()
+        return len(self._granted)
+
+
+class QuotaScheduler:
+    """Rate limits every Sheets request with a read and a write token bucket, and the
+    Drive requests with their own, as they count against a separate quota.
+    Requests over quota wait in a priority queue instead of failing."""
+
+    def __init__(self, read_per_minute: int, write_per_minute: int, drive_per_minute: int) -> None:
+        self.buckets: dict[str, TokenBucket] = {
+            "read": TokenBucket(read_per_minute),
+            "write": TokenBucket(write_per_minute),
+            "drive": TokenBucket(drive_per_minute),
+        }
+        self._waiters: dict[str, list[tuple[int, int, asyncio.Future]]] = {kind: [] for kind in self.buckets}
+        self._order: Iterator[int] = itertools.count()
+        self._dispatchers: dict[str, asyncio.Task] = {}
+
+    async def acquire(self, kind: str, priority: Priority) -> None:
+        bucket = self.buckets[kind]
+        waiters = self._waiters[kind]
+        if not waiters and bucket.try_take():
+            return
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(waiters, (priority, next(self._order), future))
+        dispatcher = self._dispatchers.get(kind)
+        if dispatcher is None or dispatcher.done():
+            self._dispatchers[kind] = asyncio.create_task(self._dispatch(kind))
+        await future
+
+    async def _dispatch(self, kind: str) -> None:
+        bucket = self.buckets[kind]
+        waiters = self._waiters[kind]
+        while True:
+            while waiters and waiters[0][2].done():
+                # Cancelled while queued.
+                heapq.heappop(waiters)
+            if not waiters:
+                return
+            if not bucket.try_take():
+                await asyncio.sleep(bucket.wait_time())
+                continue
+            _, _, future = heapq.heappop(waiters)
+            if future.done():
+                bucket.tokens += 1
+            else:
+                future.set_result(None)
+
+    async def call(self, kind: str, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Run a blocking gspread call in a worker thread once kind quota allows,
+        at the priority set with sheet_priority()."""
+        priority = _priority.get()
+        throttled = 0
+        attempt = 0
+        while True:
+            await self.acquire(kind, priority)
+            try:
+                return await asyncio.to_thread(fn, *args, **kwargs)
+            except gspread.exceptions.APIError as e:
+                if e.code == 429 and throttled < 8:
+                    # Quota used up elsewhere, e.g. by another bot on the same project:
+                    # pause the bucket so this and every other request queue behind it.
+                    self.buckets[kind].hold(min(2 ** throttled, 32))
+                    throttled += 1
+                elif e.code >= 500 and attempt < 4:
+                    await asyncio.sleep(2 ** attempt)
+                    attempt += 1
+                else:
+                    raise
+
+    def usage(self) -> dict[str, dict[str, float]]:
+        """Current state of each bucket, for monitoring."""
+        return {
+            kind: {
+                "limit": bucket.capacity,
+                "used_last_minute": bucket.used_last_minute(),
+                "available": max(0.0, bucket.tokens),
+                "queued": sum(1 for *_, future in self._waiters[kind] if not future.done()),
+            }
+            for kind, bucket in self.buckets.items()
+        }
+
+
+# Sheets quotas are per project and per user, so the scheduler is shared by every workbook.
+quota: QuotaScheduler = QuotaScheduler(
+    config.sheets_read_quota, config.sheets_write_quota, config.drive_read_quota
+)
+
+
+class ClientRegistry:
+    """The process-wide authorized gspread client and the workbooks opened with it.
+    Services share one HTTP session, so TLS connections and the access token (refreshed
+    only when it expires) survive service rebuilds and cache clears."""
+
+    # Connections kept alive per host, enough for every worker thread to hold one.
+    POOL_SIZE = 16
+
+    def __init__(self, creds_file: str) -> None:
+        self.creds_file: str = creds_file
+        self.client: Optional[gspread.Client] = None
+        self._workbooks: dict[str, gspread.Spreadsheet] = {}
+        self._lock: asyncio.Lock = asyncio.Lock()
+
+    def _authorize(self) -> gspread.Client:
+        client = gspread.service_account(filename=self.creds_file)
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.POOL_SIZE)
+        client.http_client.session.mount("https://", adapter)
+        return client
+
+    async def workbook(self, workbook_name: str) -> gspread.Spreadsheet:
+        """Open workbook_name on first use, authorizing the client if needed."""
+        async with self._lock:
+            if self.client is None:
+                self.client = await asyncio.to_thread(self._authorize)
+            workbook = self._workbooks.get(workbook_name)
+            if workbook is None:
+                workbook = await quota.call("read", self.client.open, workbook_name)
+                self._workbooks[workbook_name] = workbook
+            return workbook
+
+
+clients: ClientRegistry = ClientRegistry("secrets/creds.json")
+
+
+# Seconds a sheet found missing is reported missing without asking the backend again.
+MISSING_SHEET_TTL = 30
+
+# Headroom added when a write outgrows a worksheet, so appends do not resize it every time.
+GROW_ROWS = 1000
+GROW_COLS = 10
+# Cells per values_batch_update request, larger writes are split into several requests.
+MAX_CELLS_PER_REQUEST = 50_000
+
+
+def _block_width(values: list[list[str]]) -> int:
+    return max((len(r) for r in values), default=0)
+
+
+def _chunk_blocks(blocks: list[Block], max_cells: int) -> Iterator[list[Block]]:
+    """Split blocks into lists of at most max_cells cells, splitting tall blocks by rows."""
+    chunk: list[Block] = []
+    cells = 0
+    for sheet_name, row, col, values in blocks:
+        width = _block_width(values) or 1
+        step = max(1, max_cells // width)
+        for start in range(0, len(values), step):
+            part = values[start:start + step]
+            size = len(part) * width
+            if chunk and cells + size > max_cells:
+                yield chunk
+                chunk = []
+                cells = 0
+            chunk.append((sheet_name, row + start, col, part))
+            cells += size
+    if chunk:
+        yield chunk
+
+
+class GoogleSheetsBackend(StorageBackend):
+    """Sheets of a Google Sheets workbook, accessed through gspread in worker threads."""
+
+    def __init__(self, workbook_name: str) -> None:
+        self.workbook_name: str = workbook_name
+        self.workbook: Optional[gspread.Spreadsheet] = None
+        # Sheet name -> (sheet id, grid rows, grid cols), values can only be written inside the grid.
+        self._grids: dict[str, tuple[int, int, int]] = {}
+
+    async def _open(self) -> gspread.Spreadsheet:
+        if self.workbook is None:
+            self.workbook = await clients.workbook(self.workbook_name)
+        return self.workbook
+
+    def _remember(self, worksheet: gspread.Worksheet) -> None:
+        self._grids[worksheet.title] = (worksheet.id, worksheet.row_count, worksheet.col_count)
+
+    @staticmethod
+    def _range_name(sheet_name: str, row: int, col: int, values: list[list[str]]) -> str:
+        width = _block_width(values)
+        first = rowcol_to_a1(row + 1, col + 1)
+        last = rowcol_to_a1(row + len(values), col + width)
+        return absolute_range_name(sheet_name, f"{first}:{last}")
+
+    async def load(self, sheet_name: str) -> list[list[str]]:
+        workbook = await self._open()
+        try:
+            worksheet = await quota.call("read", workbook.worksheet, sheet_name)
+        except gspread.WorksheetNotFound as e:
+            raise SheetNotFound(sheet_name) from e
+        self._remember(worksheet)
+        return await quota.call("read", worksheet.get)
+
+    async def load_rows(self, sheet_name: str, start: int, end: int) -> list[list[str]]:
+        workbook = await self._open()
+        try:
+            response = await quota.call(
+                "read", workbook.values_get, absolute_range_name(sheet_name, f"{start + 1}:{end}")
+            )
+        except gspread.exceptions.APIError as e:
+            # The range is well-formed, so a bad request means the sheet does not exist.
+            if e.code == 400:
+                raise SheetNotFound(sheet_name) from e
+            raise
+        return response.get("values", [])
+
+    async def revision(self) -> Optional[str]:
+        """The workbook's Drive modifiedTime."""
+        workbook = await self._open()
+        return await quota.call("drive", workbook.get_lastUpdateTime)
+
+    async def load_many(
+        self, sheet_names: Optional[set[str]], exclude: set[str]
+    ) -> dict[str, list[list[str]]]:
+        workbook = await self._open()
+        # One metadata request plus one values_batch_get.
+        worksheets = await quota.call("read", workbook.worksheets)
+        for worksheet in worksheets:
+            self._remember(worksheet)
+        titles = [
+            sheet.title for sheet in worksheets
+            if (sheet_names is None or sheet.title in sheet_names) and sheet.title not in exclude
+        ]
+        if not titles:
+            return {}
+        response = await quota.call(
+            "read", workbook.values_batch_get, [absolute_range_name(title) for title in titles]
+        )
+        value_ranges = response.get("valueRanges", [])
+        return {
+            title: value_range.get("values", [])
+            for title, value_range in zip(titles, value_ranges)
+        }
+
+    async def _grow(self, workbook: gspread.Spreadsheet, blocks: list[Block]) -> None:
+        """Resize the worksheets that blocks reach past, all in one request."""
+        extents: dict[str, tuple[int, int]] = {}
+        for sheet_name, row, col, values in blocks:
+            rows, cols = extents.get(sheet_name, (0, 0))
+            extents[sheet_name] = (max(rows, row + len(values)), max(cols, col + _block_width(values)))
+        requests = []
+        grown = {}
+        for sheet_name, (rows, cols) in extents.items():
+            if sheet_name not in self._grids:
+                self._remember(await quota.call("read", workbook.worksheet, sheet_name))
+            sheet_id, grid_rows, grid_cols = self._grids[sheet_name]
+            if rows <= grid_rows and cols <= grid_cols:
+                continue
+            new_rows = grid_rows if rows <= grid_rows else rows + GROW_ROWS
+            new_cols = grid_cols if cols <= grid_cols else cols + GROW_COLS
+            requests.append({
+                "updateSheetProperties": {
+                    "properties": {
+                        "sheetId": sheet_id,
+                        "gridProperties": {"rowCount": new_rows, "columnCount": new_cols},
+                    },
+                    "fields": "gridProperties(rowCount,columnCount)",
+                }
+            })
+            grown[sheet_name] = (sheet_id, new_rows, new_cols)
+        if requests:
+            await quota.call("write", workbook.batch_update, {"requests": requests})
+            self._grids.update(grown)
+
+    async def write(self, blocks: list[Block]) -> None:
+        """Grow the worksheets as needed, then send the blocks in as few requests as
+        MAX_CELLS_PER_REQUEST allows."""
+        if not blocks:
+            return
+        workbook = await self._open()
+        await self._grow(workbook, blocks)
+        for chunk in _chunk_blocks(blocks, MAX_CELLS_PER_REQUEST):
+            data = [
+                {"range": self._range_name(sheet_name, row, col, values), "values": values}
+                for sheet_name, row, col, values in chunk
+            ]
+            body = {"valueInputOption": "RAW", "data": data}
+            await quota.call("write", workbook.values_batch_update, body=body)
+
+    async def create(self, sheet_name: str) -> None:
+        workbook = await self._open()
+        # Starts small, write() grows it to fit the data.
+        worksheet = await quota.call("write", workbook.add_worksheet, title=sheet_name, rows=100, cols=20)
+        self._remember(worksheet)
+
+    def is_permanent(self, error: Exception) -> bool:
+        # Malformed, missing or conflicting; rate limits and server errors pass with time.
+        if isinstance(error, gspread.exceptions.APIError):
+            return error.code in (400, 404, 409)
+        return isinstance(error, (SheetNotFound, gspread.WorksheetNotFound))
+
+    async def delete(self, sheet_name: str) -> None:
+        workbook = await self._open()
+        try:
+            sheet = await quota.call("read", workbook.worksheet, sheet_name)
+            await quota.call("write", workbook.del_worksheet, sheet)
+        except gspread.WorksheetNotFound:
+            pass
+        self._grids.pop(sheet_name, None)
+
+
+def make_backend(workbook_name: str) -> StorageBackend:
+    """Pick the storage backend from the SHEET_BACKEND env variable:
+    "google" (default), "sqlite", or "sqlite+google" to serve from SQLite and
+    mirror every write to the Google workbook."""
+    kind = os.getenv("SHEET_BACKEND", "google")
+    sqlite_path = os.path.join(os.getenv("SQLITE_DIR", config.storage_dir), f"{workbook_name}.sqlite3")
+    if kind == "google":
+        return GoogleSheetsBackend(workbook_name)
+    if kind == "sqlite":
+        return SQLiteBackend(sqlite_path)
+    if kind == "sqlite+google":
+        return MirroredBackend(SQLiteBackend(sqlite_path), GoogleSheetsBackend(workbook_name))
+    raise ValueError(f"Unknown SHEET_BACKEND '{kind}'")
+
+
+# Source of LocalSheet.version, shared so versions never repeat across sheet objects.
+_versions: Iterator[int] = itertools.count(1)
+
 
 class LocalSheet:
-    def __init__(self, workbook: gspread.Spreadsheet, sheet_name: str) -> None:
-        self.sheet: gspread.Worksheet = workbook.worksheet(sheet_name)
-        self._data: list[list[str]] = self.sheet.get()
+    def __init__(
+        self,
+        sheet_name: str,
+        data: list[list[str]],
+        backend: Optional[StorageBackend] = None,
+        on_commit: Optional[Callable[["LocalSheet"], Awaitable[None]]] = None,
+        indexed_columns: Iterable[int] = (),
+    ) -> None:
+        self.backend: Optional[StorageBackend] = backend
+        # When set, commit() hands the sheet to this callback instead of writing it.
+        self.on_commit = on_commit
+        self._data: list[list[str]] = data
         self._clean()
+        # Last state known to be on the remote sheet, used to diff on commit.
+        self._synced: list[list[str]] = [list(row) for row in self._data]
+        self._dirty_rows: set[int] = set()
         self._dirty: bool = False
+        self._commit_lock: asyncio.Lock = asyncio.Lock()
         self.sheet_name: str = sheet_name
+        # Changes on every change to the local grid, for callers caching values derived from it.
+        self.version: int = next(_versions)
+        # column -> cell value -> rows holding that value
+        self._indexes: dict[int, dict[str, set[int]]] = {col: {} for col in indexed_columns}
+        self._rebuild_indexes()
 
     def __getitem__(self, cell_index: tuple[int, int]) -> str:
         row, col = cell_index
@@ -20,76 +439,586 @@ class LocalSheet:
         row, col = cell_index
         while len(self._data[row]) <= col:
             self._data[row].append("")
+        index = self._indexes.get(col)
+        if index is not None:
+            self._unindex(index, self._data[row][col], row)
+            index.setdefault(value, set()).add(row)
         self._data[row][col] = value
+        self._dirty_rows.add(row)
         self._dirty = True
+        self.version = next(_versions)
 
     def get_data(self) -> list[list[str]]:
         return self._data
 
+    def synced_data(self) -> list[list[str]]:
+        """A copy of the sheet as last synced with the backend."""
+        return [list(row) for row in self._synced]
+
+    @property
+    def dirty(self) -> bool:
+        """Whether there are edits that were not committed or written yet."""
+        return self._dirty
+
     def update_data(self, data: list[list[str]]) -> None:
-        self._clean()
         self._data = data
+        self._clean()
+        self._rebuild_indexes()
+        # The caller may have edited rows in place, so every row is a candidate.
+        self._dirty_rows.update(range(max(len(self._synced), len(self._data))))
         self._dirty = True
+        self.version = next(_versions)
 
     def append_row(self, row: list[str]) -> None:
         self._data.append([str(cell) for cell in row])
+        self._index_row(len(self._data) - 1)
+        self._dirty_rows.add(len(self._data) - 1)
         self._dirty = True
+        self.version = next(_versions)
+
+    def apply_blocks(self, blocks: list[Block]) -> None:
+        """Write blocks into the local grid, e.g. when replaying a journal."""
+        for _, row, col, values in blocks:
+            for r, row_values in enumerate(values):
+                while len(self._data) <= row + r:
+                    self._data.append([])
+                cells = self._data[row + r]
+                for c, value in enumerate(row_values):
+                    while len(cells) <= col + c:
+                        cells.append("")
+                    cells[col + c] = value
+        self.update_data(self._data)
+
+    def reload(self, data: list[list[str]], start: int = 0, end: Optional[int] = None) -> bool:
+        """Take rows start..end (the whole sheet if end is None) as they are stored remotely.
+        Cells with local changes that were not written yet keep them, see _merge_row().
+        Return whether the remote rows differed from what was last synced."""
+        remote = [list(row) for row in data]
+        self._clean_grid(remote)
+        if end is None:
+            end = max(len(self._synced), len(self._data), start + len(remote))
+        changed = False
+        for row in range(start, end):
+            values = remote[row - start] if row - start < len(remote) else []
+            old = self._synced[row] if row < len(self._synced) else []
+            if values == old:
+                continue
+            changed = True
+            while len(self._synced) <= row:
+                self._synced.append([])
+            self._synced[row] = values
+            while len(self._data) <= row:
+                self._data.append([])
+            if row in self._dirty_rows:
+                self._data[row] = self._merge_row(old, self._data[row], values)
+            else:
+                self._data[row] = list(values)
+        if changed:
+            self._clean_grid(self._synced)
+            self._clean()
+            self._rebuild_indexes()
+            self.version = next(_versions)
+        return changed
+
+    @staticmethod
+    def _merge_row(base: list[str], local: list[str], remote: list[str]) -> list[str]:
+        """Three-way merge of a row against the last synced state: cells changed
+        locally keep the local value, every other cell takes the remote one."""
+        merged = []
+        for col in range(max(len(base), len(local), len(remote))):
+            base_value = base[col] if col < len(base) else ""
+            local_value = local[col] if col < len(local) else ""
+            merged.append(local_value if local_value != base_value else (remote[col] if col < len(remote) else ""))
+        while merged and not merged[-1]:
+            merged.pop()
+        return merged
+
+    def find(self, col: int, *values: str) -> list[int]:
+        """Rows whose cell in col equals any of values, in ascending order.
+        Uses the column index when one was declared, otherwise scans the sheet."""
+        return sorted(self._rows(col, values))
+
+    def _rows(self, col: int, values: Iterable[str]) -> set[int]:
+        """Rows whose cell in col is in values. May be the index's own set, do not modify it."""
+        index = self._indexes.get(col)
+        if index is None:
+            values = set(values)
+            return {row for row in range(len(self._data)) if self[row, col] in values}
+        postings = [index[value] for value in values if value in index]
+        if len(postings) == 1:
+            return postings[0]
+        return set().union(*postings)
+
+    def select(self, filters: dict[int, Iterable[str]]) -> set[int]:
+        """Rows whose cell in each filtered col is one of its values, intersecting the
+        column indexes smallest first."""
+        postings = sorted((self._rows(col, values) for col, values in filters.items()), key=len)
+        if not postings:
+            return set(range(len(self._data)))
+        rows = set(postings[0])
+        for posting in postings[1:]:
+            if not rows:
+                break
+            rows &= posting
+        return rows
+
+    def distinct(self, col: int) -> list[str]:
+        """Values that appear in col."""
+        index = self._indexes.get(col)
+        if index is None:
+            return list({self[row, col] for row in range(len(self._data))})
+        return list(index)
+
+    def counts(self, col: int, rows: Optional[set[int]] = None) -> dict[str, int]:
+        """Rows per value of col, only counting rows when given."""
+        index = self._indexes.get(col)
+        if index is None:
+            index = {}
+            for row in range(len(self._data)):
+                index.setdefault(self[row, col], set()).add(row)
+        if rows is None:
+            return {value: len(posting) for value, posting in index.items()}
+        return {value: n for value, posting in index.items() if (n := len(posting & rows))}
+
+    def find_first(self, col: int, value: str) -> Optional[int]:
+        rows = self.find(col, value)
+        return rows[0] if rows else None
+
+    def _index_row(self, row: int) -> None:
+        for col, index in self._indexes.items():
+            index.setdefault(self[row, col], set()).add(row)
+
+    @staticmethod
+    def _unindex(index: dict[str, set[int]], value: str, row: int) -> None:
+        rows = index.get(value)
+        if rows is not None:
+            rows.discard(row)
+            if not rows:
+                del index[value]
+
+    def _rebuild_indexes(self) -> None:
+        for index in self._indexes.values():
+            index.clear()
+        for row in range(len(self._data)):
+            self._index_row(row)
 
     def _clean(self):
-        for row in self._data:
+        self._clean_grid(self._data)
+
+    @staticmethod
+    def _clean_grid(grid: list[list[str]]) -> None:
+        for row in grid:
             for i in range(len(row)):
                 row[i] = str(row[i])
             while row and not row[-1]:
                 row.pop()
-        while self._data and not self._data[-1]:
-            self._data.pop()
+        while grid and not grid[-1]:
+            grid.pop()
 
-    def commit(self) -> None:
-        if self._dirty:
-            for attempt in range(5):
-                try:
-                    self.sheet.batch_clear(["A1:Z1000"])
-                    self.sheet.update(self._data)
-                    self._dirty = False
-                    break
-                except gspread.exceptions.APIError as e:
-                    if attempt == 2:
-                        raise e
-                    time.sleep(2 ** attempt)
+    def pending_blocks(self) -> list[Block]:
+        """Return blocks for cells that differ from the stored sheet.
+        Cells that were emptied are sent as "" so they get cleared remotely."""
+        blocks: list[Block] = []
+        # (start col, width) -> index in blocks of the block ending on the previous row
+        open_blocks: dict[tuple[int, int], int] = {}
+        for row in sorted(self._dirty_rows):
+            new = self._data[row] if row < len(self._data) else []
+            old = self._synced[row] if row < len(self._synced) else []
+            width = max(len(new), len(old))
+            padded = new + [""] * (width - len(new))
+            runs = []
+            start = None
+            for col in range(width):
+                changed = padded[col] != (old[col] if col < len(old) else "")
+                if changed and start is None:
+                    start = col
+                elif not changed and start is not None:
+                    runs.append((start, col))
+                    start = None
+            if start is not None:
+                runs.append((start, width))
+
+            next_open: dict[tuple[int, int], int] = {}
+            for start, end in runs:
+                key = (start, end - start)
+                idx = open_blocks.get(key)
+                if idx is not None and blocks[idx][1] + len(blocks[idx][3]) == row:
+                    blocks[idx][3].append(padded[start:end])
+                else:
+                    idx = len(blocks)
+                    blocks.append((self.sheet_name, row, start, [padded[start:end]]))
+                next_open[key] = idx
+            open_blocks = next_open
+        return blocks
+
+    def begin_sync(self) -> tuple[list[Block], tuple[dict[int, list[str]], int]]:
+        """Take the pending blocks and a copy of the rows they were built from.
+        The sheet stays editable while the write is in flight; pass the returned
+        token to end_sync() once the write finished."""
+        data = self.pending_blocks()
+        rows = {row: list(self._data[row]) for row in self._dirty_rows if row < len(self._data)}
+        token = (rows, len(self._data))
+        self._dirty_rows.clear()
+        self._dirty = False
+        return data, token
+
+    def end_sync(self, token: tuple[dict[int, list[str]], int], ok: bool) -> None:
+        rows, length = token
+        if not ok:
+            # Unknown how much reached the sheet, diff everything on the next commit.
+            self._dirty_rows.update(range(max(len(self._synced), len(self._data))))
+            self._dirty = True
+            return
+        for row in sorted(rows):
+            while len(self._synced) <= row:
+                self._synced.append([])
+            self._synced[row] = rows[row]
+        del self._synced[length:]
+
+    async def commit(self) -> None:
+        if not self._dirty:
+            return
+        if self.on_commit is not None:
+            await self.on_commit(self)
+            return
+        assert self.backend is not None, "LocalSheet has nowhere to commit to"
+        async with self._commit_lock:
+            data, token = self.begin_sync()
+            try:
+                await self.backend.write(data)
+            except Exception:
+                self.end_sync(token, False)
+                raise
+            self.end_sync(token, True)
 
     def __len__(self):
         return len(self._data)
 
+def _write_snapshot(path: str, snapshot: dict) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+        json.dump(snapshot, f, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+
+def _read_snapshot(path: str) -> Optional[dict]:
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
 class GoogleSheetService:
-    def __init__(self, workbook_name: str) -> None:
-        self.gc: gspread.Client = gspread.service_account(filename="secrets/creds.json")
-        self.workbook: gspread.Spreadsheet = self.gc.open(workbook_name)
-        self.sheets: dict[str, LocalSheet] = {}
+    def __init__(
+        self,
+        workbook_name: str,
+        write_behind: bool = False,
+        indexes: Optional[dict[str, tuple[int, ...]]] = None,
+        backend: Optional[StorageBackend] = None,
+        journal: Optional[Journal] = None,
+        max_sheets: Optional[int] = None,
+        pinned: Iterable[str] = (),
+        snapshot_path: Optional[str] = None,
+    ) -> None:
+        self.backend: StorageBackend = backend or make_backend(workbook_name)
+        # Write-behind commits are journaled so they survive until the backend has them.
+        self.journal: Optional[Journal] = journal
+        self._journal_replayed: bool = False
+        # Cached sheets, least recently used first. Past max_sheets unpinned ones are evicted.
+        self.sheets: OrderedDict[str, LocalSheet] = OrderedDict()
+        self.max_sheets: Optional[int] = max_sheets
+        self.pinned: set[str] = set(pinned)
+        # Slot name -> sheets pinned in it, see pin().
+        self._pin_slots: dict[str, set[str]] = {}
         self.workbook_name: str = workbook_name
+        # In write-behind mode commits only queue the sheet, flush() writes them all.
+        self.write_behind: bool = write_behind
+        self._pending: dict[str, LocalSheet] = {}
+        # Most urgent priority among the pending commits, the next flush runs at it.
+        self._pending_priority: Priority = Priority.BACKGROUND
+        # Sheet name pattern (fnmatch) -> columns to keep a secondary index on.
+        self.indexes: dict[str, tuple[int, ...]] = indexes or {}
+        self._flush_lock: asyncio.Lock = asyncio.Lock()
+        # In-flight loads shared by everyone asking for the same uncached sheet.
+        self._loading: dict[str, asyncio.Task] = {}
+        # Sheet name -> time.monotonic() until which it is known not to exist.
+        self._missing: dict[str, float] = {}
+        # Backend revision the cache was last checked against by refresh_changed().
+        self._revision: Optional[str] = None
+        # Set while the cache comes from a snapshot no refresh_changed() has checked yet.
+        self._stale: bool = False
+        # gzip JSON copy of the cached sheets, lets a restart skip the initial load.
+        self.snapshot_path: Optional[str] = snapshot_path
+
+    def _local_sheet(self, sheet_name: str, data: list[list[str]]) -> LocalSheet:
+        on_commit = self._mark_pending if self.write_behind else None
+        indexed_columns = {
+            col
+            for pattern, cols in self.indexes.items()
+            if fnmatch.fnmatchcase(sheet_name, pattern)
+            for col in cols
+        }
+        return LocalSheet(
+            sheet_name, data, backend=self.backend, on_commit=on_commit, indexed_columns=indexed_columns
+        )
+
+    def pin(self, sheet_name: Optional[str], slot: Optional[str] = None) -> None:
+        """Never evict sheet_name. A slot holds one sheet, pinning into it releases the
+        previous one (None just releases it)."""
+        if slot is None:
+            if sheet_name is not None:
+                self.pinned.add(sheet_name)
+        elif sheet_name is None:
+            self._pin_slots.pop(slot, None)
+        else:
+            self._pin_slots[slot] = {sheet_name}
+
+    def pin_all(self, sheet_names: Iterable[str], slot: str) -> None:
+        """Pin sheet_names into slot in place of what it held, e.g. the working set of a
+        scan that would otherwise evict each sheet just before it comes round again."""
+        self._pin_slots[slot] = set(sheet_names)
+
+    def _is_pinned(self, sheet_name: str) -> bool:
+        return sheet_name in self.pinned or any(sheet_name in names for names in self._pin_slots.values())
+
+    async def _evict(self) -> None:
+        """Drop the least recently used unpinned sheets past max_sheets.
+        Queued commits are flushed first, sheets with uncommitted edits are kept."""
+        if self.max_sheets is None:
+            return
+        candidates = [name for name in self.sheets if not self._is_pinned(name)]
+        victims = candidates[:len(candidates) - self.max_sheets]
+        if not victims:
+            return
+        if any(name in self._pending for name in victims):
+            try:
+                await self.flush()
+            except Exception:
+                # They stay cached and are tried again on the next eviction.
+                pass
+        for name in victims:
+            sheet = self.sheets.get(name)
+            if sheet is not None and name not in self._pending and not sheet.dirty:
+                del self.sheets[name]
+
+    async def _mark_pending(self, sheet: LocalSheet) -> None:
+        # Queued before the journal write so a flush running meanwhile covers this entry.
+        self._pending[sheet.sheet_name] = sheet
+        self._pending_priority = min(self._pending_priority, _priority.get())
+        if self.journal is not None:
+            await self.journal.append(sheet.pending_blocks())
+
+    async def replay_journal(self) -> None:
+        """Re-apply journaled commits the backend never confirmed, e.g. after a crash.
+        Until this ran the journal is never compacted."""
+        if self.journal is None:
+            return
+        blocks_by_sheet: dict[str, list[Block]] = {}
+        for _, blocks in self.journal.entries():
+            for block in blocks:
+                blocks_by_sheet.setdefault(block[0], []).append(block)
+        for sheet_name, blocks in blocks_by_sheet.items():
+            try:
+                sheet = await self.get(sheet_name)
+            except SheetNotFound:
+                # Deleted since, e.g. by end_season.
+                continue
+            sheet.apply_blocks(blocks)
+            self._pending[sheet_name] = sheet
+        self._journal_replayed = True
+
+    @property
+    def ready(self) -> bool:
+        """Whether new commits are safe: none of the journal is left to replay and a
+        snapshot was checked against the backend. Before that rows the journal or the
+        workbook already hold look empty and could be taken twice."""
+        return not self.needs_replay and not self._stale
+
+    @property
+    def needs_replay(self) -> bool:
+        """Whether the journal may hold commits replay_journal() has not re-applied yet."""
+        return self.journal is not None and not self._journal_replayed
+
+    def has_pending(self) -> bool:
+        return bool(self._pending)
+
+    async def flush(self) -> None:
+        """Write every committed-but-unwritten sheet in one batch request."""
+        async with self._flush_lock:
+            if self._pending:
+                sheets = list(self._pending.values())
+                self._pending.clear()
+                priority = self._pending_priority
+                self._pending_priority = Priority.BACKGROUND
+                journal_seq = self.journal.seq if self.journal is not None else 0
+                tokens = []
+                data = []
+                for sheet in sheets:
+                    sheet_data, token = sheet.begin_sync()
+                    data.extend(sheet_data)
+                    tokens.append(token)
+                try:
+                    with sheet_priority(priority):
+                        await self.backend.write(data)
+                except BaseException:
+                    # Also on cancellation, e.g. of the flush loop by cog_unload().
+                    for sheet, token in zip(sheets, tokens):
+                        sheet.end_sync(token, False)
+                        self._pending[sheet.sheet_name] = sheet
+                    self._pending_priority = min(self._pending_priority, priority)
+                    raise
+                for sheet, token in zip(sheets, tokens):
+                    sheet.end_sync(token, True)
+                if self.journal is not None and self._journal_replayed:
+                    self.journal.compact(journal_seq)
+            with sheet_priority(Priority.BACKGROUND):
+                await self.backend.sync()
+
+    async def prefetch(self, sheet_names: Optional[Iterable[str]] = None) -> None:
+        """Load all worksheets (or only sheet_names) that are not cached yet in bulk."""
+        names = set(sheet_names) if sheet_names is not None else None
+        if not self.sheets:
+            # The cache starts here, sheets loaded later are at least this fresh.
+            self._revision = await self.backend.revision()
+        grids = await self.backend.load_many(names, set(self.sheets))
+        for sheet_name, data in grids.items():
+            self._missing.pop(sheet_name, None)
+            self.sheets.setdefault(sheet_name, self._local_sheet(sheet_name, data))
+        await self._evict()
 
-    def create_sheet(self, sheet_name: str) -> None:
+    async def create_sheet(self, sheet_name: str) -> None:
         if sheet_name in self.sheets:
             raise ValueError(f"Sheet '{sheet_name}' already exists.")
-        self.workbook.add_worksheet(title=sheet_name, rows=100, cols=20)
-        self.sheets[sheet_name] = LocalSheet(self.workbook, sheet_name)
+        await self.backend.create(sheet_name)
+        self._missing.pop(sheet_name, None)
+        self.sheets[sheet_name] = self._local_sheet(sheet_name, [])
+        await self._evict()
 
-    def __getitem__(self, sheet_name) -> LocalSheet:
-        if sheet_name not in self.sheets:
-            max_retries = 3        
-            for attempt in range(max_retries):
-                try:
-                    self.sheets[sheet_name] = LocalSheet(self.workbook, sheet_name)
-                    break                    
-                except Exception as e:
-                    if attempt == max_retries - 1:
-                        raise e                         
-                    time.sleep(2)
-        return self.sheets[sheet_name]
-    
-    def __delitem__(self, sheet_name: str) -> None:
-        try:
-            if sheet_name in self.sheets:
-                del self.sheets[sheet_name]
-            self.workbook.del_worksheet(self.workbook.worksheet(sheet_name))
-        except gspread.WorksheetNotFound:
-            pass
+    async def _load(self, sheet_name: str) -> LocalSheet:
+        max_retries = 3
+        for attempt in range(max_retries):
+            try:
+                data = await self.backend.load(sheet_name)
+                break
+            except SheetNotFound:
+                self._missing[sheet_name] = time.monotonic() + MISSING_SHEET_TTL
+                raise
+            except Exception as e:
+                if attempt == max_retries - 1:
+                    raise e
+                await asyncio.sleep(2)
+        # Keep the cached copy if the sheet was created or prefetched meanwhile.
+        sheet = self.sheets.setdefault(sheet_name, self._local_sheet(sheet_name, data))
+        await self._evict()
+        return sheet
+
+    def _load_done(self, sheet_name: str, task: asyncio.Task) -> None:
+        self._loading.pop(sheet_name, None)
+        if not task.cancelled():
+            # Retrieved here so it is not reported as unhandled when every waiter went away.
+            task.exception()
+
+    async def get(self, sheet_name: str) -> LocalSheet:
+        sheet = self.sheets.get(sheet_name)
+        if sheet is not None:
+            self.sheets.move_to_end(sheet_name)
+            return sheet
+        missing_until = self._missing.get(sheet_name)
+        if missing_until is not None:
+            if time.monotonic() < missing_until:
+                raise SheetNotFound(sheet_name)
+            del self._missing[sheet_name]
+        task = self._loading.get(sheet_name)
+        if task is None:
+            task = asyncio.create_task(self._load(sheet_name))
+            self._loading[sheet_name] = task
+            task.add_done_callback(lambda t: self._load_done(sheet_name, t))
+        # Shielded so one caller giving up does not cancel the load for the others.
+        return await asyncio.shield(task)
+
+    def _forget(self, sheet_name: str) -> None:
+        self.sheets.pop(sheet_name, None)
+        self._pending.pop(sheet_name, None)
+
+    async def refresh(self, sheet_name: str) -> None:
+        """Reload a cached sheet from the backend, keeping local changes not written yet."""
+        sheet = self.sheets.get(sheet_name)
+        if sheet is None:
+            return
+        # Under the flush lock so no write is in flight while rows are replaced.
+        async with self._flush_lock:
+            try:
+                data = await self.backend.load(sheet_name)
+            except SheetNotFound:
+                self._forget(sheet_name)
+                return
+            sheet.reload(data)
+
+    async def refresh_rows(self, sheet_name: str, start: int, end: int) -> None:
+        """Reload rows start..end (0-based, end excluded) of a cached sheet."""
+        sheet = self.sheets.get(sheet_name)
+        if sheet is None:
+            return
+        async with self._flush_lock:
+            try:
+                data = await self.backend.load_rows(sheet_name, start, end)
+            except SheetNotFound:
+                self._forget(sheet_name)
+                return
+            sheet.reload(data, start, end)
+
+    async def refresh_changed(self, force: bool = False) -> list[str]:
+        """Reload the cached sheets whose remote content changed and return their names.
+        Nothing is read when the backend revision is the same as on the last call,
+        unless force is set, e.g. when the revision itself cannot be trusted."""
+        revision = await self.backend.revision()
+        if not force and revision is not None and revision == self._revision:
+            # Unchanged since the snapshot too, so it is validated as it is.
+            self._stale = False
+            return []
+        changed = []
+        async with self._flush_lock:
+            grids = await self.backend.load_many(set(self.sheets), set())
+            for sheet_name, sheet in list(self.sheets.items()):
+                data = grids.get(sheet_name)
+                if data is None:
+                    self._forget(sheet_name)
+                    changed.append(sheet_name)
+                elif sheet.reload(data):
+                    changed.append(sheet_name)
+        self._revision = revision
+        self._stale = False
+        return changed
+
+    async def save_snapshot(self) -> None:
+        """Write the synced state of every cached sheet and the revision it was checked at.
+        Commits not written yet are left out, the journal holds those."""
+        if self.snapshot_path is None:
+            return
+        snapshot = {
+            "revision": self._revision,
+            "sheets": {name: sheet.synced_data() for name, sheet in self.sheets.items()},
+        }
+        await asyncio.to_thread(_write_snapshot, self.snapshot_path, snapshot)
+
+    async def load_snapshot(self) -> bool:
+        """Fill the cache from the snapshot, return False when there is none.
+        The sheets are as fresh as when it was saved; refresh_changed() compares the
+        revision it was saved at with the backend and reloads what changed since."""
+        if self.snapshot_path is None:
+            return False
+        snapshot = await asyncio.to_thread(_read_snapshot, self.snapshot_path)
+        if snapshot is None:
+            return False
+        for sheet_name, data in snapshot["sheets"].items():
+            self.sheets.setdefault(sheet_name, self._local_sheet(sheet_name, data))
+        self._revision = snapshot["revision"]
+        self._stale = True
+        return True
+
+    async def delete_sheet(self, sheet_name: str) -> None:
+        self._forget(sheet_name)
+        await self.backend.delete(sheet_name)
+        self._missing[sheet_name] = time.monotonic() + MISSING_SHEET_TTL
@@ -0,0 +1,56 @@
+import asyncio
+import json
+import os
+from services.storage_backend import Block
+
+
+class Journal:
+    """Append-only log of committed sheet blocks that the backend has not confirmed yet.
+    Every entry is fsync'd before append() returns, so a commit survives a crash or
+    an unreachable backend and can be replayed on the next start."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        entries = self.entries()
+        self.seq: int = entries[-1][0] if entries else 0
+
+    def entries(self) -> list[tuple[int, list[Block]]]:
+        if not os.path.exists(self.path):
+            return []
+        entries = []
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # A torn last line from a crash mid-write, it was never acknowledged.
+                    break
+                blocks = [tuple(block) for block in entry["blocks"]]
+                entries.append((entry["seq"], blocks))
+        return entries
+
+    async def append(self, blocks: list[Block]) -> int:
+        """Write blocks to the journal and wait until they are on disk."""
+        self.seq += 1
+        seq = self.seq
+        # Opened per entry so a compaction replacing the file never strands a handle.
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"seq": seq, "blocks": blocks}) + "\n")
+            f.flush()
+            await asyncio.to_thread(os.fsync, f.fileno())
+        return seq
+
+    def compact(self, upto: int) -> None:
+        """Drop the entries up to seq upto once the backend has them."""
+        if upto >= self.seq:
+            open(self.path, "w", encoding="utf-8").close()
+            return
+        keep = [(seq, blocks) for seq, blocks in self.entries() if seq > upto]
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for seq, blocks in keep:
+                f.write(json.dumps({"seq": seq, "blocks": blocks}) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
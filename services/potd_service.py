@@ -1,19 +1,23 @@
 import os
 import config
 import utils.utils as utils
-import asyncio
 import discord
 from collections import defaultdict
 from typing import Union, Optional, Tuple, Any
 from discord.ext import commands
-from services.google_sheet_service import GoogleSheetService, LocalSheet
+from services.google_sheet_service import GoogleSheetService, LocalSheet, Priority, sheet_priority
+from services.journal import Journal
+from services.rwlock import ReadWriteLock
+from services.user_directory import user_directory
 from logger import Logger
 import random
 from utils.ansi_utils import create_ansi_message, ansi_colorize
 from utils.potd_utils import (
     COLUMN,
     get_potd_num_to_post,
+    PotdRow,
 )
+from utils.catalog_utils import RowMapper, Status
 
 
 class Menu(discord.ui.View):
@@ -27,7 +31,7 @@ class Menu(discord.ui.View):
         data = self.main_sheet.get_data()
         num = self.to_append[0] = len(data)
         self.main_sheet.append_row(self.to_append)
-        self.main_sheet.commit()
+        await self.main_sheet.commit()
         await interaction.response.edit_message(
             content=f"Uploaded as POTD {num}. Accepted by {interaction.user}", view=None
         )
@@ -45,11 +49,25 @@ class PotdService:
     def __init__(self, bot: commands.Bot) -> None:
         """Initialize the PotdService with a bot instance."""
         self.logger = Logger(bot)
-        self.gss: GoogleSheetService = GoogleSheetService("POTD")
+        self.gss: GoogleSheetService = GoogleSheetService(
+            "POTD",
+            write_behind=True,
+            journal=Journal(os.path.join(config.storage_dir, "POTD.journal")),
+            max_sheets=config.sheet_cache_size,
+            pinned=("Sheet1", "data"),
+            snapshot_path=os.path.join(config.storage_dir, "POTD.snapshot.json.gz"),
+            indexes={
+                "Sheet1": (COLUMN["status"], COLUMN["topic"], COLUMN["creator"], COLUMN["difficulty"]),
+                "potd_*": (0,),
+            },
+        )
         self.bot: commands.Bot = bot
         self.live_potd: Optional[int] = None
-        self.lock: asyncio.Lock = asyncio.Lock()
-        self.user_cache: dict[str, str] = {}  # Cache for user ID to username mapping
+        # Commands that only read take self.lock.read(), the rest take it exclusively.
+        # Submissions and daily posts are let in first, leaderboards and random fetches last.
+        self.lock: ReadWriteLock = ReadWriteLock(config.command_queue_limits)
+        self.user_directory = user_directory(bot)
+        self.catalog: RowMapper[PotdRow] = RowMapper(PotdRow)
 
     async def random(
         self,
@@ -59,37 +77,33 @@ class PotdService:
         difficulty: Optional[str],
     ) -> bool:
         """Fetch a random POTD based on the topic, curator, and difficulty."""
-        async with self.lock:
-            main_sheet = self.gss["Sheet1"]
-            valid_potds = []
-            for num in range(1, len(main_sheet)):
-                if main_sheet[num, COLUMN["status"]] == "done":
-                    if (
-                        (topic is None or main_sheet[num, COLUMN["topic"]] == topic)
-                        and (
-                            curator is None
-                            or main_sheet[num, COLUMN["creator"]] == str(curator.name)
-                        )
-                        and (
-                            difficulty is None
-                            or main_sheet[num, COLUMN["difficulty"]] in difficulty
-                        )
-                    ):
-                        valid_potds.append(num)
+        async with self.lock.read(Priority.BACKGROUND):
+            main_sheet = await self.gss.get("Sheet1")
+            filters = {COLUMN["status"]: ("done",)}
+            if topic is not None:
+                filters[COLUMN["topic"]] = (topic,)
+            if curator is not None:
+                filters[COLUMN["creator"]] = (str(curator.name),)
+            if difficulty is not None:
+                # Every difficulty that is part of the filter, "Easy" matches "Easy/Medium".
+                filters[COLUMN["difficulty"]] = [
+                    value for value in main_sheet.distinct(COLUMN["difficulty"]) if value in difficulty
+                ]
+            valid_potds = main_sheet.select(filters)
             if not valid_potds:
                 return False
-            potd_num = random.choice(valid_potds)
+            row = self.catalog.get(main_sheet, random.choice(tuple(valid_potds)))
             await utils.post_question(
                 pqotd="POTD",
                 channel=channel,
-                num=main_sheet[potd_num, COLUMN["potd_num"]],
-                date=main_sheet[potd_num, COLUMN["date"]],
-                day=main_sheet[potd_num, COLUMN["day"]],
-                file_path=main_sheet[potd_num, COLUMN["problem path"]],
-                creator=main_sheet[potd_num, COLUMN["creator"]],
-                difficulty=main_sheet[potd_num, COLUMN["difficulty"]],
-                topic=main_sheet[potd_num, COLUMN["topic"]],
-                points=main_sheet[potd_num, COLUMN["points"]],
+                num=row.potd_num,
+                date=row.date,
+                day=row.day,
+                file_path=row.problem_path,
+                creator=row.creator,
+                difficulty=row.difficulty,
+                topic=row.topic,
+                points=row.points,
             )
             return True
 
@@ -98,100 +112,100 @@ class PotdService:
     ) -> bool:
         """Add score to a user for solving the POTD."""
         async with self.lock:
-            main_sheet = self.gss["Sheet1"]
+            main_sheet = await self.gss.get("Sheet1")
             user_id = str(user_id or user.id)
             if num < 1 or num >= len(main_sheet) or main_sheet[num, COLUMN["status"]] not in ["live", "active"]:
                 await self.logger.warning(f"Invalid POTD number, for add_score: {num}")
                 return False
-            score_sheet = self.gss[f"potd_{num}"]
-            for row in range(len(score_sheet)):
-                if score_sheet[row, 0] == user_id:
-                    current_score = int(score_sheet[row, 1])
-                    score_sheet[row, 1] = str(current_score + points)
-                    score_sheet.commit()
-                    return True
+            score_sheet = await self.gss.get(f"potd_{num}")
+            row = score_sheet.find_first(0, user_id)
+            if row is not None:
+                current_score = int(score_sheet[row, 1])
+                score_sheet[row, 1] = str(current_score + points)
+                await score_sheet.commit()
+                return True
             # If user not found, add a new entry
             score_sheet.append_row([user_id, str(points)])
-            score_sheet.commit()
+            await score_sheet.commit()
             return True
         
     async def update_leaderboard(self, num: int) -> bool:
         """Update the leaderboard for a specific POTD."""
-        async with self.lock:
-            return await self._update_leaderboard(num)
+        async with self.lock.write(Priority.BACKGROUND):
+            with sheet_priority(Priority.BACKGROUND):
+                return await self._update_leaderboard(num)
             
     async def _update_leaderboard(self, potd_num: int) -> bool:
-        main_sheet = self.gss["Sheet1"]
-        if potd_num < 1 or potd_num >= len(main_sheet) or main_sheet[potd_num, COLUMN["status"]] not in ["active", "live"]:
+        main_sheet = await self.gss.get("Sheet1")
+        if potd_num < 1 or potd_num >= len(main_sheet) or self.catalog.get(main_sheet, potd_num).status not in (
+            Status.ACTIVE,
+            Status.LIVE,
+        ):
             await self.logger.warning(f"Invalid POTD number, for update_leaderboard: {potd_num}")
             return False
         scores = defaultdict(int)
-        for num in range(1, potd_num + 1):
-            if main_sheet[num, COLUMN["status"]] in ["live", "active"]:
-                score_sheet = self.gss[f"potd_{num}"]
-                for row in range(len(score_sheet)):
-                    user_id = score_sheet[row, 0]
-                    points = int(score_sheet[row, 1])
-                    scores[user_id] += points
-        message = self.gss["data"][1, 0]
-        season = self.gss["data"][1, 1]
+        nums = [num for num in main_sheet.find(COLUMN["status"], "live", "active") if num <= potd_num]
+        self.gss.pin_all((f"potd_{num}" for num in nums), slot="leaderboard")
+        for num in nums:
+            score_sheet = await self.gss.get(f"potd_{num}")
+            for row in range(len(score_sheet)):
+                user_id = score_sheet[row, 0]
+                points = int(score_sheet[row, 1])
+                scores[user_id] += points
+        data_sheet = await self.gss.get("data")
+        message = data_sheet[1, 0]
+        season = data_sheet[1, 1]
         message = message.format(
             potd=potd_num,
             season=season,
         )
         # self.logger.debug(f"Updating leaderboard for POTD {potd_num} with scores: {scores}")
-        for rank, (userid, point) in enumerate(
-            sorted(scores.items(), key=lambda x: float(x[1]), reverse=True)[:30],
-            start=1,
-        ):
+        top = sorted(scores.items(), key=lambda x: float(x[1]), reverse=True)[:30]
+        names = await self.user_directory.names(userid for userid, _ in top)
+        for rank, (userid, point) in enumerate(top, start=1):
             rank_dot = f"{rank}."
-            username = await self._get_user_name_or_id(userid)
+            username = names[userid]
             message += f"\n{rank_dot:4} {username[:29]:29} {float(point):.3f}"
         message += "\n```"
         
         leaderboard_channel = self.bot.get_channel(config.potd_leaderboard)
-        if main_sheet[potd_num, COLUMN["leaderboard"]].strip():
-            msg = await leaderboard_channel.fetch_message(int(main_sheet[potd_num, COLUMN["leaderboard"]]))
+        row = self.catalog.get(main_sheet, potd_num)
+        if row.leaderboard_msg is not None:
+            msg = await leaderboard_channel.fetch_message(row.leaderboard_msg)
             await msg.edit(content=message)
         else:
             msg = await leaderboard_channel.send(message)
-            main_sheet[potd_num, COLUMN["leaderboard"]] = str(msg.id)
-            main_sheet.commit()
+            row = self.catalog.get(main_sheet, potd_num)
+            row.leaderboard_msg = msg.id
+            self.catalog.write(main_sheet, row)
+            await main_sheet.commit()
         return True
 
-    async def _get_user_name_or_id(self, user_id: str) -> str:
-        try:
-            return self.user_cache[user_id]
-        except KeyError:
-            pass
-        try:
-            user = await self.bot.fetch_user(int(user_id))
-            return user.name if user else user_id
-        except Exception as e:
-            await self.logger.warning(f"Failed to fetch user for ID {user_id}: {e}")
-            return user_id
-
     async def pending(
         self, channel: discord.TextChannel, num: Optional[int]
     ) -> discord.Embed:
         """Get the pending POTD or a specific POTD if num is provided."""
-        async with self.lock:
-            main_sheet = self.gss["Sheet1"]
+        async with self.lock.read():
+            main_sheet = await self.gss.get("Sheet1")
             if num is None:
                 embed = discord.Embed(
                     title="Pending POTD",
                     color=discord.Color.yellow(),
                 )
                 max_pending = 10
-                for i in range(1, len(main_sheet)):
-                    if main_sheet[i, COLUMN["status"]] == "pending":
-                        embed.add_field(
-                            name=f"POTD {i}",
-                            value=(f"Topic: {main_sheet[i, COLUMN['topic']]}, Points: {main_sheet[i, COLUMN['points']]}, Source: {main_sheet[i, COLUMN['source']]}"),
-                            inline=False,
-                        )
-                        if len(embed.fields) >= max_pending:
-                            break
+                pending = main_sheet.find(COLUMN["status"], "pending")
+                for i in pending[:max_pending]:
+                    embed.add_field(
+                        name=f"POTD {i}",
+                        value=(f"Topic: {main_sheet[i, COLUMN['topic']]}, Points: {main_sheet[i, COLUMN['points']]}, Source: {main_sheet[i, COLUMN['source']]}"),
+                        inline=False,
+                    )
+                if pending:
+                    by_topic = main_sheet.counts(COLUMN["topic"], set(pending))
+                    embed.set_footer(
+                        text=f"{len(pending)} pending: "
+                        + ", ".join(f"{topic or 'no topic'} {n}" for topic, n in sorted(by_topic.items()))
+                    )
                 return embed
             else:
                 if (
@@ -239,7 +253,7 @@ class PotdService:
         difficulty: str,
     ) -> bool:
         async with self.lock:
-            main_sheet = self.gss["Sheet1"]
+            main_sheet = await self.gss.get("Sheet1")
             if num < 1 or num >= len(main_sheet):
                 await self.logger.warning(f"Invalid POTD number: {num}")
                 return False
@@ -259,28 +273,79 @@ class PotdService:
             main_sheet[num, COLUMN["difficulty"]] = (
                 difficulty or main_sheet[num, COLUMN["difficulty"]]
             )
-            main_sheet.commit()
+            await main_sheet.commit()
             await self.logger.info(f"Updated POTD {num} successfully")
             return True
 
     async def daily_problem(self) -> None:
         """Post the problem of the day (POTD) every day at a specified time."""
-        async with self.lock:
-            if self.gss["data"][1, 2] == "live":
+        async with self.lock.write(Priority.SUBMISSION):
+            data_sheet = await self.gss.get("data")
+            if data_sheet[1, 2] == "live":
                 self.live_potd = None
                 await self._daily_problem()
             else:
                 self.live_potd = None
                 await self.logger.info("Toggle is OFF, skipping POTD post")
 
-    async def clear(self):
-        while self.lock.locked():
-            await asyncio.sleep(0.1)
-        await self.lock.acquire()
+    async def refresh(self) -> list[str]:
+        """Reload every cached POTD sheet from the workbook, whatever its revision says,
+        and return the ones that changed. Local commits are written first."""
+        async with self.lock:
+            await self.gss.flush()
+            changed = await self.gss.refresh_changed(force=True)
+            # Found again from Sheet1, in case it was what had gone stale.
+            self.live_potd = None
+            return changed
+
+    async def poll_remote(self) -> None:
+        """Merge in edits curators made directly in the POTD spreadsheet.
+        Runs without the service lock, reloading a sheet never awaits halfway."""
+        with sheet_priority(Priority.BACKGROUND):
+            changed = await self.gss.refresh_changed()
+        if "Sheet1" in changed:
+            self.live_potd = None
+        if changed:
+            await self.logger.info(f"Reloaded POTD sheets edited remotely: {', '.join(changed)}")
+
+    async def prefetch(self) -> None:
+        """Warm the cache from the last snapshot, reloading what changed since it was
+        saved, or when there is none load the catalog and the live and active POTD sheets
+        in bulk. Then re-apply journaled commits that never reached the workbook."""
+        try:
+            with sheet_priority(Priority.BACKGROUND):
+                if await self.gss.load_snapshot():
+                    # If this fails poll_remote() retries it, the cache is not ready until then.
+                    await self.gss.refresh_changed()
+                else:
+                    await self.gss.prefetch(["Sheet1", "data"])
+                    main_sheet = await self.gss.get("Sheet1")
+                    await self._get_live_potd_num()
+                    names = [f"potd_{num}" for num in main_sheet.find(COLUMN["status"], "live", "active")]
+                    self.gss.pin_all(names, slot="leaderboard")
+                    await self.gss.prefetch(names)
+        except Exception as e:
+            await self.logger.error("Failed to prefetch POTD sheets", e)
+        try:
+            await self.gss.replay_journal()
+        except Exception as e:
+            await self.logger.error("Failed to replay the POTD journal", e)
+
+    async def save_snapshot(self) -> None:
+        """Save the POTD sheet cache to disk for a fast restart."""
+        await self.gss.save_snapshot()
+
+    async def flush(self) -> None:
+        """Write all queued sheet commits to the workbook, first replaying the journal
+        if prefetch() could not."""
+        if self.gss.needs_replay:
+            async with self.lock.write(Priority.BACKGROUND):
+                await self.gss.replay_journal()
+        await self.gss.flush()
 
     async def check(self, channel: utils.ChannelType):
         async with self.lock:
-            main_sheet = self.gss["Sheet1"]
+            main_sheet = await self.gss.get("Sheet1")
             import os, re
             for file in os.listdir("potd_images"):
                 match = re.search(r"potd_(\d+)\.", file)
@@ -290,7 +355,7 @@ class PotdService:
                 else:
                     # Optional: print a warning or skip the file if it doesn't match the pattern
                     print(f"Skipping file: {file} (No pattern match)")
-            main_sheet.commit()
+            await main_sheet.commit()
             await channel.send("Checked for new POTD images and updated links accordingly.")
                     
             
@@ -301,13 +366,13 @@ class PotdService:
         potd_num: int,
     ) -> bool:
         """Post the POTD for a specific POTD number."""
-        async with self.lock:
-            main_sheet = self.gss["Sheet1"]
-            if (
-                potd_num < 1
-                or potd_num >= len(main_sheet)
-                or main_sheet[potd_num, COLUMN["status"]] not in ["done", "active"]
-            ):
+        async with self.lock.read():
+            main_sheet = await self.gss.get("Sheet1")
+            if potd_num < 1 or potd_num >= len(main_sheet):
+                await self.logger.warning(f"Invalid POTD number: {potd_num}")
+                return False
+            row = self.catalog.get(main_sheet, potd_num)
+            if row.status not in (Status.DONE, Status.ACTIVE):
                 await self.logger.warning(f"Invalid POTD number: {potd_num}")
                 return False
 
@@ -315,27 +380,27 @@ class PotdService:
             await utils.post_question(
                 pqotd="POTD",
                 channel=channel,
-                num=self.gss["Sheet1"][potd_num, COLUMN["potd_num"]],
-                date=self.gss["Sheet1"][potd_num, COLUMN["date"]],
-                day=self.gss["Sheet1"][potd_num, COLUMN["day"]],
-                file_path=self.gss["Sheet1"][potd_num, COLUMN["problem path"]],
-                creator=self.gss["Sheet1"][potd_num, COLUMN["creator"]],
-                difficulty=self.gss["Sheet1"][potd_num, COLUMN["difficulty"]],
-                topic=self.gss["Sheet1"][potd_num, COLUMN["topic"]],
-                points=self.gss["Sheet1"][potd_num, COLUMN["points"]],
+                num=row.potd_num,
+                date=row.date,
+                day=row.day,
+                file_path=row.problem_path,
+                creator=row.creator,
+                difficulty=row.difficulty,
+                topic=row.topic,
+                points=row.points,
             )
             return True
 
     async def solution(self, potd_num: int, link: str = "") -> str:
-        async with self.lock:
-            main_sheet = self.gss["Sheet1"]
+        async with self.lock if link else self.lock.read():
+            main_sheet = await self.gss.get("Sheet1")
             if potd_num < 1 or potd_num >= len(main_sheet):
                 await self.logger.warning(f"Invalid POTD number: {potd_num}")
                 return "Invalid POTD number"
             if link:
                 await self.logger.info(f"Updating solution link for POTD {potd_num}")
                 main_sheet[potd_num, COLUMN["solution"]] = link
-                main_sheet.commit()
+                await main_sheet.commit()
                 await self.logger.info("Solution link updated successfully")
                 return "Solution link updated successfully"
             else:
@@ -361,8 +426,9 @@ class PotdService:
         self, interaction: discord.Interaction, potd_num: Optional[int], solution: discord.Attachment
     ) -> None:
         """Submit an answer for the POTD."""
-        async with self.lock:
-            return await self._submit(interaction, potd_num, solution)
+        async with self.lock.write(Priority.SUBMISSION):
+            with sheet_priority(Priority.SUBMISSION):
+                return await self._submit(interaction, potd_num, solution)
             
 
     async def upload(
@@ -377,7 +443,7 @@ class PotdService:
     ) -> None:
         """Upload a new POTD to the Google Sheet and post it in the specified channel."""
         async with self.lock:
-            main_sheet = self.gss["Sheet1"]
+            main_sheet = await self.gss.get("Sheet1")
             potd_num = len(main_sheet)
             file_name = await utils.upload_image("potd_images", potd_num, problem, self.logger)
             to_append = [
@@ -416,12 +482,12 @@ class PotdService:
         self, interaction: discord.Interaction, potd_num: Optional[int], solution: discord.Attachment
     ) -> bool:
         if potd_num is None:
-            potd_num = self._get_live_potd_num()
+            potd_num = await self._get_live_potd_num()
             if potd_num is None:
                 await self.logger.warning("No live POTD to submit solution for")
                 return False, "There is no live POTD to submit a solution for."
-        main_sheet = self.gss["Sheet1"]
-        if potd_num < 1 or potd_num >= len(main_sheet) or main_sheet[potd_num, COLUMN["status"]] == "pending":
+        main_sheet = await self.gss.get("Sheet1")
+        if potd_num < 1 or potd_num >= len(main_sheet) or self.catalog.get(main_sheet, potd_num).status is Status.PENDING:
             await self.logger.warning(f"Invalid POTD number: {potd_num}")
             return False, "Invalid POTD number."
         potd_botspam_channel = self.bot.get_channel(config.potd_botspam)
@@ -431,17 +497,17 @@ class PotdService:
         return True, "Solution submitted successfully."
  
     async def _daily_problem(self) -> None:
-        main_sheet = self.gss["Sheet1"]
+        main_sheet = await self.gss.get("Sheet1")
         potd_num_to_post = get_potd_num_to_post(main_sheet)
         if potd_num_to_post is None:
             await self.logger.warning("No POTD available to post")
             potd_planning = self.bot.get_channel(config.potd_planning)
             
-            self.live_potd = self._get_live_potd_num()
+            self.live_potd = await self._get_live_potd_num()
             if self.live_potd is not None:
                 main_sheet[self.live_potd, COLUMN["status"]] = "active"
                 self.live_potd = None
-                main_sheet.commit()
+                await main_sheet.commit()
             
             assert isinstance(
                 potd_planning, discord.TextChannel
@@ -452,24 +518,28 @@ class PotdService:
             return
 
         # Complete the previous POTD if it is still live
-        if main_sheet[potd_num_to_post - 1, COLUMN["status"]] == "live":
+        previous = self.catalog.get(main_sheet, potd_num_to_post - 1)
+        if previous.status is Status.LIVE:
             await self.logger.info(f"Completing previous POTD {potd_num_to_post-1}")
-            main_sheet[potd_num_to_post - 1, COLUMN["status"]] = "active"
+            previous.status = Status.ACTIVE
+            self.catalog.write(main_sheet, previous)
 
         await self.logger.info(f"Setting POTD {potd_num_to_post} status to live")
-        main_sheet[potd_num_to_post, COLUMN["status"]] = "live"
-        main_sheet[potd_num_to_post, COLUMN["date"]] = utils.get_date()
-        main_sheet[potd_num_to_post, COLUMN["day"]] = utils.get_day()
+        row = self.catalog.get(main_sheet, potd_num_to_post)
+        row.status = Status.LIVE
+        row.date = utils.get_date()
+        row.day = utils.get_day()
+        self.catalog.write(main_sheet, row)
         await utils.post_question(
             pqotd="POTD",
             channel=self.bot.get_channel(config.problem_of_the_day),
-            num=main_sheet[potd_num_to_post, COLUMN["potd_num"]],
-            date=main_sheet[potd_num_to_post, COLUMN["date"]],
-            day=main_sheet[potd_num_to_post, COLUMN["day"]],
-            file_path=main_sheet[potd_num_to_post, COLUMN["problem path"]],
-            creator=main_sheet[potd_num_to_post, COLUMN["creator"]],
-            difficulty=main_sheet[potd_num_to_post, COLUMN["difficulty"]],
-            points=main_sheet[potd_num_to_post, COLUMN["points"]],
+            num=row.potd_num,
+            date=row.date,
+            day=row.day,
+            file_path=row.problem_path,
+            creator=row.creator,
+            difficulty=row.difficulty,
+            points=row.points,
             announce=True,
         )
         await self.logger.info("Posted new POTD")
@@ -483,18 +553,16 @@ class PotdService:
         await problem_of_the_day_channel.send(
             f"<@&{config.potd_role}> to submit your solution use  /potd submit command in my({self.bot.user.mention}) DM."
         )
-        self.gss.create_sheet(f"potd_{potd_num_to_post}")
+        await self.gss.create_sheet(f"potd_{potd_num_to_post}")
         # final commit
-        main_sheet.commit()
+        await main_sheet.commit()
         await self.logger.info("Daily problem processing completed")
 
     
-    def _get_live_potd_num(self) -> Optional[int]:
+    async def _get_live_potd_num(self) -> Optional[int]:
         if self.live_potd is not None:
             return self.live_potd
-        main_sheet = self.gss["Sheet1"]
-        for num in range(1, len(main_sheet)):
-            if main_sheet[num, COLUMN["status"]] == "live":
-                self.live_potd = num
-                return num
-        return None
+        main_sheet = await self.gss.get("Sheet1")
+        self.live_potd = main_sheet.find_first(COLUMN["status"], "live")
+        self.gss.pin(f"potd_{self.live_potd}" if self.live_potd is not None else None, slot="live")
+        return self.live_potd
@@ -1,3 +1,4 @@
+import os
 import config
 import utils.utils as utils
 import asyncio
@@ -6,23 +7,28 @@ from typing import Union, Optional, Tuple, Any
 from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 from datetime import datetime, time
 from discord.ext import commands
-from services.google_sheet_service import GoogleSheetService, LocalSheet
+from services.google_sheet_service import GoogleSheetService, LocalSheet, Priority, sheet_priority
+from services.journal import Journal
+from services.rwlock import ReadWriteLock
+from services.storage_backend import SheetNotFound
+from services.user_directory import user_directory
 from logger import Logger
 import random
+from collections import deque
 from utils.ansi_utils import create_ansi_message, ansi_colorize
 from utils.qotd_utils import (
     COLUMN,
     get_qotd_num_to_post,
     get_statistics_embed,
     get_submit_embed,
-    grade,
-    get_score,
     is_correct_answer,
     create_scores_embed,
     create_submission_embed,
-    get_stats,
     create_log_embed,
+    ScoringEngine,
+    QotdRow,
 )
+from utils.catalog_utils import RowMapper, Status
 
 
 class Menu(discord.ui.View):
@@ -36,7 +42,7 @@ class Menu(discord.ui.View):
         data = self.main_sheet.get_data()
         num = self.to_append[0] = len(data)
         self.main_sheet.append_row(self.to_append)
-        self.main_sheet.commit()
+        await self.main_sheet.commit()
         await interaction.response.edit_message(
             content=f"Uploaded as QoTD {num}. Accepted by {interaction.user}", view=None
         )
@@ -50,20 +56,69 @@ class Menu(discord.ui.View):
         self.stop()
 
 
+class Submission:
+    """An answer /qotd submit graded and queued, waiting for persist_submissions()
+    to commit it and post_submissions() to announce it."""
+
+    def __init__(
+        self,
+        user: Union[discord.User, discord.Member],
+        qotd_num: int,
+        embed: discord.Embed,
+        is_correct: bool,
+        first_solve: bool,
+    ) -> None:
+        self.user = user
+        self.qotd_num = qotd_num
+        self.embed = embed
+        self.is_correct = is_correct
+        self.first_solve = first_solve
+        # Resolved once the commit is in the journal, the user is answered only then.
+        self.committed: asyncio.Future = asyncio.get_running_loop().create_future()
+
+
 class QotdService:
     def __init__(self, bot: commands.Bot) -> None:
         """Initialize the QotdService with a bot instance."""
         self.logger = Logger(bot)
-        self.gss: GoogleSheetService = GoogleSheetService("QOTD")
+        self.gss: GoogleSheetService = GoogleSheetService(
+            "QOTD",
+            write_behind=True,
+            journal=Journal(os.path.join(config.storage_dir, "QOTD.journal")),
+            max_sheets=config.sheet_cache_size,
+            pinned=("Sheet1", "data", "Leaderboard"),
+            snapshot_path=os.path.join(config.storage_dir, "QOTD.snapshot.json.gz"),
+            indexes={
+                "Sheet1": (COLUMN["status"], COLUMN["topic"], COLUMN["creator"], COLUMN["difficulty"]),
+                "qotd *": (0,),
+                "Leaderboard": (0,),
+            },
+        )
         self.bot: commands.Bot = bot
         self.live_qotd: Optional[int] = None
-        self.lock: asyncio.Lock = asyncio.Lock()
-        self.users: dict[str, str] = {}
+        # Commands that only read take self.lock.read(), the rest take it exclusively.
+        # Submissions and daily posts are let in first, leaderboards and random fetches last.
+        self.lock: ReadWriteLock = ReadWriteLock(config.command_queue_limits)
+        self.user_directory = user_directory(bot)
         self.is_end_season: bool = False
         self.solved_cache = set()
+        # Submissions in the order they were taken, before and after their commit.
+        self._intake: deque[Submission] = deque()
+        self._announce: deque[Submission] = deque()
+        self.scoring: ScoringEngine = ScoringEngine()
+        self.catalog: RowMapper[QotdRow] = RowMapper(QotdRow)
+        self._leaderboard_dirty: bool = False
+        # Last render published, to skip edits that would not change anything.
+        self._published_leaderboard: Optional[dict[str, Any]] = None
+        # Renders are numbered as they are taken under the lock. Publishing is serialized
+        # and skips a render older than the last one out, so edits never go backwards.
+        self._renders: int = 0
+        self._published_render: int = 0
+        self._publish_lock: asyncio.Lock = asyncio.Lock()
 
-    def get_faq(self):
-        return self.gss["faq"].get_data()
+    async def get_faq(self):
+        faq_sheet = await self.gss.get("faq")
+        return faq_sheet.get_data()
 
     async def random(
         self,
@@ -73,36 +128,32 @@ class QotdService:
         difficulty: Optional[str],
     ) -> bool:
         """Fetch a random QOTD based on the topic, curator, and difficulty."""
-        async with self.lock:
-            main_sheet = self.gss["Sheet1"]
-            valid_qotds = []
-            for num in range(1, len(main_sheet.get_data())):
-                if main_sheet[num, COLUMN["status"]] == "done":
-                    if (
-                        (topic is None or main_sheet[num, COLUMN["topic"]] == topic)
-                        and (
-                            curator is None
-                            or main_sheet[num, COLUMN["creator"]] == str(curator.name)
-                        )
-                        and (
-                            difficulty is None
-                            or main_sheet[num, COLUMN["difficulty"]] in difficulty
-                        )
-                    ):
-                        valid_qotds.append(num)
+        async with self.lock.read(Priority.BACKGROUND):
+            main_sheet = await self.gss.get("Sheet1")
+            filters = {COLUMN["status"]: ("done",)}
+            if topic is not None:
+                filters[COLUMN["topic"]] = (topic,)
+            if curator is not None:
+                filters[COLUMN["creator"]] = (str(curator.name),)
+            if difficulty is not None:
+                # Every difficulty that is part of the filter, "Easy" matches "Easy/Medium".
+                filters[COLUMN["difficulty"]] = [
+                    value for value in main_sheet.distinct(COLUMN["difficulty"]) if value in difficulty
+                ]
+            valid_qotds = main_sheet.select(filters)
             if not valid_qotds:
                 return False
-            qotd_num = random.choice(valid_qotds)
+            row = self.catalog.get(main_sheet, random.choice(tuple(valid_qotds)))
             await utils.post_question(
                 pqotd="QOTD",
                 channel=channel,
-                num=main_sheet[qotd_num, COLUMN["qotd_num"]],
-                date=main_sheet[qotd_num, COLUMN["date"]],
-                day=main_sheet[qotd_num, COLUMN["day"]],
-                links=main_sheet[qotd_num, COLUMN["question path"]],
-                creator=main_sheet[qotd_num, COLUMN["creator"]],
-                difficulty=main_sheet[qotd_num, COLUMN["difficulty"]],
-                topic=main_sheet[qotd_num, COLUMN["topic"]],
+                num=row.qotd_num,
+                date=row.date,
+                day=row.day,
+                links=row.question_path,
+                creator=row.creator,
+                difficulty=row.difficulty,
+                topic=row.topic,
             )
             return True
 
@@ -110,25 +161,29 @@ class QotdService:
         self, channel: discord.TextChannel, num: Optional[int]
     ) -> discord.Embed:
         """Get the pending QOTD or a specific QOTD if num is provided."""
-        async with self.lock:
-            main_sheet = self.gss["Sheet1"]
+        async with self.lock.read():
+            main_sheet = await self.gss.get("Sheet1")
             if num is None:
                 embed = discord.Embed(
                     title="Pending QOTD",
                     color=discord.Color.yellow(),
                 )
                 max_pending = 10
-                for i in range(1, len(main_sheet)):
-                    if main_sheet[i, COLUMN["status"]] == "pending":
-                        embed.add_field(
-                            name=f"QOTD {i}",
-                            value=(f"Topic: {main_sheet[i, COLUMN['topic']]}, Source: {main_sheet[i, COLUMN['source']]}"),
-                            inline=False,
-                        )
-                        if len(embed.fields) >= max_pending:
-                            break
+                pending = main_sheet.find(COLUMN["status"], "pending")
+                for i in pending[:max_pending]:
+                    embed.add_field(
+                        name=f"QOTD {i}",
+                        value=(f"Topic: {main_sheet[i, COLUMN['topic']]}, Source: {main_sheet[i, COLUMN['source']]}"),
+                        inline=False,
+                    )
                 if not embed.fields:
                     embed.description = "No pending QOTD found."
+                else:
+                    by_topic = main_sheet.counts(COLUMN["topic"], set(pending))
+                    embed.set_footer(
+                        text=f"{len(pending)} pending: "
+                        + ", ".join(f"{topic or 'no topic'} {n}" for topic, n in sorted(by_topic.items()))
+                    )
                 return embed
             else:
                 if (
@@ -173,7 +228,7 @@ class QotdService:
         difficulty: str,
     ) -> bool:
         async with self.lock:
-            main_sheet = self.gss["Sheet1"]
+            main_sheet = await self.gss.get("Sheet1")
             if num < 1 or num >= len(main_sheet.get_data()):
                 await self.logger.warning(f"Invalid QOTD number: {num}")
                 return False
@@ -197,14 +252,15 @@ class QotdService:
             main_sheet[num, COLUMN["difficulty"]] = (
                 difficulty or main_sheet[num, COLUMN["difficulty"]]
             )
-            main_sheet.commit()
+            await main_sheet.commit()
             await self.logger.info(f"Updated QOTD {num} successfully")
             return True
 
     async def daily_question(self) -> None:
         """Post the question of the day (QOTD) every day at a specified time."""
-        async with self.lock:
-            if self.gss["data"][1, 3] == "live":
+        async with self.lock.write(Priority.SUBMISSION):
+            data_sheet = await self.gss.get("data")
+            if data_sheet[1, 3] == "live":
                 await self._update_leaderboard_stats()
                 self.live_qotd = None
                 await self._daily_question()
@@ -213,16 +269,69 @@ class QotdService:
                 self.live_qotd = None
                 await self.logger.info("Toggle is OFF, skipping QOTD post")
 
-    async def clear(self):
-        while self.lock.locked():
-            await asyncio.sleep(0.1)
-        await self.lock.acquire()
+    async def refresh(self) -> list[str]:
+        """Reload every cached QOTD sheet from the workbook, whatever its revision says,
+        and return the ones that changed. Local commits are written first."""
+        async with self.lock:
+            await self._commit_submissions()
+            await self.gss.flush()
+            changed = await self.gss.refresh_changed(force=True)
+            # Found again from Sheet1, in case it was what had gone stale.
+            self.live_qotd = None
+            return changed
+
+    async def poll_remote(self) -> None:
+        """Merge in edits curators made directly in the QOTD spreadsheet.
+        Runs without the service lock, reloading a sheet never awaits halfway."""
+        with sheet_priority(Priority.BACKGROUND):
+            changed = await self.gss.refresh_changed()
+        if "Sheet1" in changed:
+            self.live_qotd = None
+        if changed:
+            await self.logger.info(f"Reloaded QOTD sheets edited remotely: {', '.join(changed)}")
+
+    async def prefetch(self) -> None:
+        """Warm the cache from the last snapshot, reloading what changed since it was
+        saved, or when there is none load the catalog and the live and active QOTD sheets
+        in bulk. Then re-apply journaled commits that never reached the workbook."""
+        try:
+            with sheet_priority(Priority.BACKGROUND):
+                if await self.gss.load_snapshot():
+                    # If this fails poll_remote() retries it, the cache is not ready until then.
+                    await self.gss.refresh_changed()
+                else:
+                    await self.gss.prefetch(["Sheet1", "data", "Leaderboard"])
+                    main_sheet = await self.gss.get("Sheet1")
+                    await self._get_live_qotd_num()
+                    names = [f"qotd {num}" for num in main_sheet.find(COLUMN["status"], "active", "live")]
+                    self.gss.pin_all(names, slot="scoring")
+                    await self.gss.prefetch(names)
+        except Exception as e:
+            await self.logger.error("Failed to prefetch QOTD sheets", e)
+        try:
+            await self.gss.replay_journal()
+        except Exception as e:
+            await self.logger.error("Failed to replay the QOTD journal", e)
+
+    async def save_snapshot(self) -> None:
+        """Save the QOTD sheet cache to disk for a fast restart."""
+        await self.gss.save_snapshot()
+
+    async def flush(self) -> None:
+        """Write all queued sheet commits to the workbook, first replaying the journal
+        if prefetch() could not."""
+        if self.gss.needs_replay:
+            async with self.lock.write(Priority.BACKGROUND):
+                await self.gss.replay_journal()
+        await self.gss.flush()
 
     async def update_leaderboard(self) -> bool:
         """Update the leaderboard with the latest QOTD statistics."""
-        async with self.lock:
-            if self.gss["data"][1, 3] == "live":
-                return await self._update_leaderboard_stats()
+        async with self.lock.write(Priority.BACKGROUND):
+            data_sheet = await self.gss.get("data")
+            if data_sheet[1, 3] == "live":
+                with sheet_priority(Priority.BACKGROUND):
+                    return await self._update_leaderboard_stats()
             else:
                 return False
 
@@ -232,13 +341,13 @@ class QotdService:
         qotd_num: int,
     ) -> bool:
         """Post the QOTD for a specific QOTD number."""
-        async with self.lock:
-            main_sheet = self.gss["Sheet1"]
-            if (
-                qotd_num < 1
-                or qotd_num >= len(main_sheet.get_data())
-                or main_sheet[qotd_num, COLUMN["status"]] not in ["done", "active"]
-            ):
+        async with self.lock.read():
+            main_sheet = await self.gss.get("Sheet1")
+            if qotd_num < 1 or qotd_num >= len(main_sheet.get_data()):
+                await self.logger.warning(f"Invalid QOTD number: {qotd_num}")
+                return False
+            row = self.catalog.get(main_sheet, qotd_num)
+            if row.status not in (Status.DONE, Status.ACTIVE):
                 await self.logger.warning(f"Invalid QOTD number: {qotd_num}")
                 return False
 
@@ -246,19 +355,19 @@ class QotdService:
             await utils.post_question(
                 pqotd="QOTD",
                 channel=channel,
-                num=self.gss["Sheet1"][qotd_num, COLUMN["qotd_num"]],
-                date=self.gss["Sheet1"][qotd_num, COLUMN["date"]],
-                day=self.gss["Sheet1"][qotd_num, COLUMN["day"]],
-                file_path=self.gss["Sheet1"][qotd_num, COLUMN["question path"]],
-                creator=self.gss["Sheet1"][qotd_num, COLUMN["creator"]],
-                difficulty=self.gss["Sheet1"][qotd_num, COLUMN["difficulty"]],
-                topic=self.gss["Sheet1"][qotd_num, COLUMN["topic"]],
+                num=row.qotd_num,
+                date=row.date,
+                day=row.day,
+                file_path=row.question_path,
+                creator=row.creator,
+                difficulty=row.difficulty,
+                topic=row.topic,
             )
             return True
 
     async def solution(self, qotd_num: int, solution: Optional[discord.Attachment] = None) -> Tuple[str, discord.File | None]:
-        async with self.lock:
-            main_sheet = self.gss["Sheet1"]
+        async with self.lock if solution else self.lock.read():
+            main_sheet = await self.gss.get("Sheet1")
             if qotd_num < 1 or qotd_num >= len(main_sheet.get_data()):
                 await self.logger.warning(f"Invalid QOTD number: {qotd_num}")
                 return "Invalid QOTD number", None
@@ -267,7 +376,7 @@ class QotdService:
                 await self.logger.info(f"Updating solution for QOTD {qotd_num}")
                 solution_file_path = await utils.upload_image("qotd_images", qotd_num, solution, self.logger) 
                 main_sheet[qotd_num, COLUMN["solution"]] = solution_file_path
-                main_sheet.commit()
+                await main_sheet.commit()
                 await self.logger.info("Solution updated successfully")
                 return "Solution updated successfully", None
             else:
@@ -297,10 +406,107 @@ class QotdService:
         self, interaction: discord.Interaction, qotd_num: Optional[int], answer: str
     ) -> None:
         """Submit an answer for the QOTD."""
-        async with self.lock:
-            action_needed = await self._submit(interaction, qotd_num, answer)
-            if action_needed:
-                await self._update_leaderboard_stats()
+        # Only validation and grading hold the lock for one submission. The commit is
+        # shared by everything queued meanwhile and announcements go to post_submissions().
+        async with self.lock.write(Priority.SUBMISSION):
+            with sheet_priority(Priority.SUBMISSION):
+                reply = await self._submit(interaction, qotd_num, answer)
+        if isinstance(reply, Submission):
+            # Whoever gets the lock first commits the whole queue, the others find it empty.
+            try:
+                await self.persist_submissions()
+            except Exception as e:
+                # Still queued, the persist_submissions loop retries it.
+                await self.logger.error("Failed to commit QOTD submissions", e)
+            try:
+                await reply.committed
+            except SheetNotFound:
+                reply = "This QOTD has been closed, your answer was not recorded."
+            else:
+                reply = reply.embed
+        if isinstance(reply, discord.Embed):
+            await interaction.followup.send(embed=reply)
+        else:
+            await interaction.followup.send(reply)
+
+    async def _commit_submissions(self) -> None:
+        """Commit the sheets of the queued submissions and hand them to
+        post_submissions(), call with the lock held."""
+        batch = list(self._intake)
+        self._intake.clear()
+        by_num: dict[int, list[Submission]] = {}
+        for submission in batch:
+            by_num.setdefault(submission.qotd_num, []).append(submission)
+        # Numbers whose sheet was committed or is gone, the rest go back in the queue on error.
+        done: dict[int, bool] = {}
+        try:
+            with sheet_priority(Priority.SUBMISSION):
+                for num, submissions in by_num.items():
+                    try:
+                        qotd_sheet = await self.gss.get(f"qotd {num}")
+                    except SheetNotFound:
+                        # Deleted by end_season or in the spreadsheet, retrying would never succeed.
+                        done[num] = False
+                        await self.logger.warning(
+                            f"Dropped {len(submissions)} submission(s) for QOTD {num}, its sheet no longer exists"
+                        )
+                        continue
+                    await qotd_sheet.commit()
+                    done[num] = True
+        except BaseException:
+            # Also on cancellation, e.g. by cog_unload(), which commits them again.
+            self._intake.extendleft(reversed([s for s in batch if s.qotd_num not in done]))
+            raise
+        finally:
+            for submission in batch:
+                if submission.committed.done() or submission.qotd_num not in done:
+                    continue
+                if done[submission.qotd_num]:
+                    submission.committed.set_result(None)
+                else:
+                    submission.committed.set_exception(SheetNotFound(f"qotd {submission.qotd_num}"))
+            committed = [s for s in batch if done.get(s.qotd_num)]
+            self._announce.extend(committed)
+            if any(submission.is_correct for submission in committed):
+                # Published by publish_leaderboard(), at most once per interval.
+                self._leaderboard_dirty = True
+
+    async def persist_submissions(self) -> None:
+        """Commit every submission taken since the last run, one commit per sheet."""
+        if not self._intake:
+            return
+        async with self.lock.write(Priority.SUBMISSION):
+            await self._commit_submissions()
+
+    async def post_submissions(self) -> None:
+        """Post the botspam and qotd_logs embeds and solver roles of committed submissions."""
+        if not self._announce:
+            return
+        botspam = utils.get_text_channel(self.bot, config.qotd_botspam)
+        qotd_logs = utils.get_text_channel(self.bot, config.qotd_logs)
+        phods = self.bot.get_guild(config.phods)
+        assert phods, "PHODS guild not found"
+        solver_role = phods.get_role(config.qotd_solver)
+        while self._announce:
+            # Removed only once handled, so a cancelled run leaves it for the next one.
+            submission = self._announce[0]
+            user = submission.user
+            try:
+                await botspam.send(embed=submission.embed)
+                if submission.is_correct:
+                    if submission.first_solve:
+                        color = [discord.Color.green(), discord.Color.yellow(), discord.Color.blue()][
+                            submission.qotd_num % 3
+                        ]
+                        await qotd_logs.send(embed=create_log_embed(user, submission.qotd_num, color))
+                    member = phods.get_member(user.id)
+                    if member and solver_role is not None:
+                        await member.add_roles(solver_role)
+                        await self.logger.info(f"Added solver role to user {user.id}")
+            except Exception as e:
+                # One failed announcement must not hold back the others.
+                await self.logger.error(f"Error announcing submission of {user.id} for QOTD {submission.qotd_num}", e)
+            self._announce.popleft()
 
     async def upload(
         self,
@@ -316,7 +522,7 @@ class QotdService:
     ) -> None:
         """Upload a new QOTD to the Google Sheet and post it in the specified channel."""
         async with self.lock:
-            main_sheet = self.gss["Sheet1"]
+            main_sheet = await self.gss.get("Sheet1")
             qotd_num = len(main_sheet.get_data())
             file_name = await utils.upload_image("qotd_images", qotd_num, question, self.logger)
             to_append = [
@@ -354,7 +560,7 @@ class QotdService:
             )
 
     async def get_scores(self, user: discord.abc.User):
-        async with self.lock:
+        async with self.lock.read():
             scores = await self._get_scores(str(user.id))
             embed = create_scores_embed(user.name, scores)
             return embed
@@ -363,16 +569,16 @@ class QotdService:
         self, user: Union[discord.User, discord.Member], qotd_num: int
     ) -> Optional[discord.Embed]:
         """Send the status of the QOTD to the user."""
-        async with self.lock:
-            main_sheet = self.gss["Sheet1"]
+        async with self.lock.read():
+            main_sheet = await self.gss.get("Sheet1")
             if main_sheet[qotd_num, COLUMN["status"]] in ["live", "active"]:
                 answer = main_sheet[qotd_num, COLUMN["answer"]]
                 tolerance = main_sheet[qotd_num, COLUMN["tolerance"]]
                 sub = []
-                for userid, *submissions in self.gss[f"qotd {qotd_num}"].get_data():
-                    if userid == str(user.id):
-                        sub = submissions
-                        break
+                qotd_sheet = await self.gss.get(f"qotd {qotd_num}")
+                row = qotd_sheet.find_first(0, str(user.id))
+                if row is not None:
+                    sub = qotd_sheet.get_data()[row][1:]
                 embed = create_submission_embed(user, qotd_num, sub, answer, tolerance)
                 # await self.logger.warning(embed=embed)
                 return embed
@@ -386,7 +592,7 @@ class QotdService:
     ) -> Tuple[bool, str]:
         """Update the user's submissions for a specific QOTD."""
         async with self.lock:
-            main_sheet = self.gss["Sheet1"]
+            main_sheet = await self.gss.get("Sheet1")
             try:
                 new_submissions = [s.strip() for s in submissions.split(",")]
                 float_submissions = [float(s) for s in new_submissions]
@@ -397,18 +603,17 @@ class QotdService:
             if 1 <= qotd_num < len(main_sheet.get_data()) and main_sheet[
                 qotd_num, COLUMN["status"]
             ] in ["live", "active"]:
-                qotd_sheet = self.gss[f"qotd {qotd_num}"]
+                qotd_sheet = await self.gss.get(f"qotd {qotd_num}")
                 data = qotd_sheet.get_data()
                 previous_submissions = "No Submissions"
-                for i, (userid, *submissions) in enumerate(data):
-                    if userid == str(user.id):
-                        data[i] = [str(user.id)] + new_submissions
-                        previous_submissions = ", ".join(submissions)
-                        break
+                row = qotd_sheet.find_first(0, str(user.id))
+                if row is not None:
+                    previous_submissions = ", ".join(data[row][1:])
+                    data[row] = [str(user.id)] + new_submissions
                 else:
                     data.append([str(user.id)] + new_submissions)
                 qotd_sheet.update_data(data)
-                qotd_sheet.commit()
+                await qotd_sheet.commit()
                 return True, previous_submissions
             return False, ""
 
@@ -419,18 +624,17 @@ class QotdService:
     ) -> Tuple[bool, str]:
         """Update the user's offset in the leaderboard."""
         async with self.lock:
-            leaderboard_sheet = self.gss["Leaderboard"]
+            leaderboard_sheet = await self.gss.get("Leaderboard")
             data = leaderboard_sheet.get_data()
             previous_offset = "No Offset"
-            for i, (userid, score) in enumerate(data):
-                if userid == str(user.id):
-                    previous_offset = score
-                    data[i] = [str(user.id), offset]
-                    break
+            row = leaderboard_sheet.find_first(0, str(user.id))
+            if row is not None:
+                previous_offset = data[row][1]
+                data[row] = [str(user.id), offset]
             else:
                 data.append([str(user.id), offset])
             leaderboard_sheet.update_data(data)
-            leaderboard_sheet.commit()
+            await leaderboard_sheet.commit()
             return True, previous_offset
 
     async def clear_submissions(
@@ -440,7 +644,7 @@ class QotdService:
     ) -> bool:
         """Clear submissions for a specific QOTD or for a specific user."""
         async with self.lock:
-            main_sheet = self.gss["Sheet1"]
+            main_sheet = await self.gss.get("Sheet1")
             if (
                 qotd_num < 1
                 or qotd_num >= len(main_sheet.get_data())
@@ -450,33 +654,36 @@ class QotdService:
                     f"Invalid QOTD number cmd clear_submissions: {qotd_num}"
                 )
                 return False
-            qotd_sheet = self.gss[f"qotd {qotd_num}"]
+            qotd_sheet = await self.gss.get(f"qotd {qotd_num}")
             data = qotd_sheet.get_data()
             if user is None:
                 qotd_sheet.update_data([])
-                qotd_sheet.commit()
+                await qotd_sheet.commit()
                 return True
             else:
-                new_data = [row for row in data if row[0] != str(user.id)]
-                if len(new_data) == len(data):
+                row = qotd_sheet.find_first(0, str(user.id))
+                if row is None:
                     return False
+                new_data = data[:row] + data[row + 1:]
                 qotd_sheet.update_data(new_data)
-                qotd_sheet.commit()
+                await qotd_sheet.commit()
                 return True
             
     async def start_season(self) -> bool:
         """Start a new QOTD season."""
         async with self.lock:
-            if self.gss["data"][1, 3] == "done":
-                self.gss["data"][1, 3] = "live"
-                self.gss["data"].commit()
+            data_sheet = await self.gss.get("data")
+            if data_sheet[1, 3] == "done":
+                data_sheet[1, 3] = "live"
+                await data_sheet.commit()
                 await self.logger.info("Started a new QOTD season")
                 return True
         return False
 
-    def get_time(self):
+    async def get_time(self):
         """Get the time for the daily QOTD post."""
-        time_str = self.gss["data"][1, 4]
+        data_sheet = await self.gss.get("data")
+        time_str = data_sheet[1, 4]
         hour, minute = map(int, time_str.split(","))
         return hour, minute
 
@@ -498,41 +705,36 @@ class QotdService:
             utc_dt = local_dt.astimezone(ZoneInfo("UTC"))
             utc_hour = utc_dt.hour
             utc_minute = utc_dt.minute
-            self.gss["data"][1, 4] = f"{utc_hour},{utc_minute}"
-            self.gss["data"].commit()
+            data_sheet = await self.gss.get("data")
+            data_sheet[1, 4] = f"{utc_hour},{utc_minute}"
+            await data_sheet.commit()
             return utc_hour, utc_minute
 
     async def _submit(
         self, interaction: discord.Interaction, qotd_num: Optional[int], answer_str: str
-    ) -> bool:
-        main_sheet = self.gss["Sheet1"]
+    ) -> Union[str, discord.Embed, Submission]:
+        """Validate and grade a submission, returning the reply or the queued Submission."""
+        if not self.gss.ready:
+            return "Submissions are paused while the bot catches up with the QOTD sheet, please try again in a minute."
+        main_sheet = await self.gss.get("Sheet1")
         user = interaction.user
-        action_needed = False
-        qotd_num = qotd_num or self._get_live_qotd_num()
+        qotd_num = qotd_num or await self._get_live_qotd_num()
         if qotd_num is None:
             await self.logger.warning("No live QOTD for submission")
-            await interaction.followup.send(
-                "No live QOTD available to submit an answer for."
-            )
-            return False
-        if (
-            qotd_num < 1
-            or qotd_num >= len(main_sheet.get_data())
-            or main_sheet[qotd_num, COLUMN["status"]] == "pending"
-        ):
+            return "No live QOTD available to submit an answer for."
+        if qotd_num < 1 or qotd_num >= len(main_sheet.get_data()):
             await self.logger.warning(f"Invalid QOTD number {qotd_num} for submission")
-            await interaction.followup.send("Invalid QOTD number")
-            return False
+            return "Invalid QOTD number"
+        row = self.catalog.get(main_sheet, qotd_num)
+        if row.status is Status.PENDING:
+            await self.logger.warning(f"Invalid QOTD number {qotd_num} for submission")
+            return "Invalid QOTD number"
         try:
             answer = float(answer_str)
         except ValueError:
-            await interaction.followup.send(
-                "Invalid answer format. Please provide a numeric answer."
-            )
-            return False
-        correct_ans = float(main_sheet[qotd_num, COLUMN["answer"]])
-        tolerance = float(main_sheet[qotd_num, COLUMN["tolerance"]])
-        is_correct = is_correct_answer(correct_ans, answer, tolerance)
+            return "Invalid answer format. Please provide a numeric answer."
+        assert row.answer is not None and row.tolerance is not None, f"QOTD {qotd_num} has no answer or tolerance"
+        is_correct = is_correct_answer(row.answer, answer, row.tolerance)
         embed = get_submit_embed(
             user=user,
             qotd_num=qotd_num,
@@ -544,57 +746,41 @@ class QotdService:
         member = phods.get_member(user.id)
         if member and member.get_role(config.qotd_banned):
             await self.logger.warning(f"Banned user {user.id} attempted to submit an answer")
-            await interaction.followup.send("You are banned from submitting answers for QOTD.")
-            return False
+            return "You are banned from submitting answers for QOTD."
         if (
-            main_sheet[qotd_num, COLUMN["status"]] == "live"
+            row.status is Status.LIVE
             and member
             and not member.get_role(config.staff)
             and not member.get_role(config.qotd_creator)
         ):
-            qotd_sheet = self.gss[f"qotd {qotd_num}"]
-            data = qotd_sheet.get_data()
-            for sub in data:
-                if sub[0] == str(user.id):
-                    sub.append(str(answer))
-                    break
+            qotd_sheet = await self.gss.get(f"qotd {qotd_num}")
+            version = qotd_sheet.version
+            row = qotd_sheet.find_first(0, str(user.id))
+            if row is None:
+                qotd_sheet.append_row([str(user.id), str(answer)])
             else:
-                data.append([str(user.id), str(answer)])
-
-            qotd_sheet.update_data(data)
-            qotd_sheet.commit()
-            await utils.get_text_channel(self.bot, config.qotd_botspam).send(
-                embed=embed
-            )
-            if is_correct:
-                action_needed = True
-                if (user.id, qotd_num) not in self.solved_cache:
-                    qotd_logs = utils.get_text_channel(self.bot, config.qotd_logs)
-                    color = [discord.Color.green(), discord.Color.yellow(), discord.Color.blue()][qotd_num % 3]
-                    log_embed = create_log_embed(user, qotd_num, color)
-                    await qotd_logs.send(embed=log_embed)
-                    self.solved_cache.add((user.id, qotd_num))
-                member = phods.get_member(user.id)
-                if member:
-                    role = phods.get_role(config.qotd_solver)
-                    if role is not None:
-                        await member.add_roles(role)
-                        await self.logger.info(f"Added solver role to user {user.id}")
-        await interaction.followup.send(embed=embed)
-        return action_needed
+                qotd_sheet[row, len(qotd_sheet.get_data()[row])] = str(answer)
+            self.scoring.record(qotd_num, str(user.id), str(answer), version, qotd_sheet.version)
+            first_solve = is_correct and (user.id, qotd_num) not in self.solved_cache
+            if first_solve:
+                self.solved_cache.add((user.id, qotd_num))
+            submission = Submission(user, qotd_num, embed, is_correct, first_solve)
+            self._intake.append(submission)
+            return submission
+        return embed
 
     async def _daily_question(self) -> None:
-        main_sheet = self.gss["Sheet1"]
+        main_sheet = await self.gss.get("Sheet1")
         qotd_num_to_post = get_qotd_num_to_post(main_sheet)
         if qotd_num_to_post is None:
             await self.logger.warning("No QOTD available to post")
             qotd_planning = self.bot.get_channel(config.qotd_planning)
             
-            self.live_qotd = self._get_live_qotd_num()
+            self.live_qotd = await self._get_live_qotd_num()
             if self.live_qotd is not None:
                 main_sheet[self.live_qotd, COLUMN["status"]] = "active"
                 self.live_qotd = None
-                main_sheet.commit()
+                await main_sheet.commit()
             
             assert isinstance(
                 qotd_planning, discord.TextChannel
@@ -605,35 +791,39 @@ class QotdService:
             return
 
         # Complete the previous QOTD if it is still live
-        if main_sheet[qotd_num_to_post - 1, COLUMN["status"]] == "live":
+        previous = self.catalog.get(main_sheet, qotd_num_to_post - 1)
+        if previous.status is Status.LIVE:
             await self.logger.info(f"Completing previous QOTD {qotd_num_to_post-1}")
-            main_sheet[qotd_num_to_post - 1, COLUMN["status"]] = "active"
+            previous.status = Status.ACTIVE
+            self.catalog.write(main_sheet, previous)
 
         # Increment the QOTD number in the for leaderboard
-        data_sheet = self.gss["data"]
+        data_sheet = await self.gss.get("data")
         data_sheet[1, 1] = str(int(data_sheet[1, 1]) + 1)
-        data_sheet.commit()
+        await data_sheet.commit()
         await self.logger.info(f"Creating new sheet for QOTD {qotd_num_to_post}")
         try:
-            self.gss.create_sheet(f"qotd {qotd_num_to_post}")
+            await self.gss.create_sheet(f"qotd {qotd_num_to_post}")
         except Exception as e:
             await self.logger.error(
                 "Unable to create the sheet, maybe already existed", e
             )
         # Update the main sheet with the new QOTD details
         await self.logger.info(f"Setting QOTD {qotd_num_to_post} status to live")
-        main_sheet[qotd_num_to_post, COLUMN["status"]] = "live"
-        main_sheet[qotd_num_to_post, COLUMN["date"]] = utils.get_date()
-        main_sheet[qotd_num_to_post, COLUMN["day"]] = utils.get_day()
+        row = self.catalog.get(main_sheet, qotd_num_to_post)
+        row.status = Status.LIVE
+        row.date = utils.get_date()
+        row.day = utils.get_day()
+        self.catalog.write(main_sheet, row)
         await utils.post_question(
             pqotd="QOTD",
             channel=self.bot.get_channel(config.question_of_the_day),
-            num=main_sheet[qotd_num_to_post, COLUMN["qotd_num"]],
-            date=main_sheet[qotd_num_to_post, COLUMN["date"]],
-            day=main_sheet[qotd_num_to_post, COLUMN["day"]],
-            file_path=main_sheet[qotd_num_to_post, COLUMN["question path"]],
-            creator=main_sheet[qotd_num_to_post, COLUMN["creator"]],
-            difficulty=main_sheet[qotd_num_to_post, COLUMN["difficulty"]],
+            num=row.qotd_num,
+            date=row.date,
+            day=row.day,
+            file_path=row.question_path,
+            creator=row.creator,
+            difficulty=row.difficulty,
             announce=True,
         )
         await self.logger.info("Posted new QOTD")
@@ -646,7 +836,7 @@ class QotdService:
         # stats
         stats_embed = get_statistics_embed(
             num=qotd_num_to_post,
-            creator=main_sheet[qotd_num_to_post, COLUMN["creator"]],
+            creator=row.creator,
         )
         question_of_the_day_channel = self.bot.get_channel(config.question_of_the_day)
         assert isinstance(
@@ -658,7 +848,7 @@ class QotdService:
         await question_of_the_day_channel.send(
             f"<@&{config.qotd_role}> to submit your answer use /qotd submit command in my({self.bot.user.mention}) DM."
         )
-        main_sheet[qotd_num_to_post, COLUMN["stats"]] = str(stats_msg.id)
+        stats_msg_id = stats_msg.id
 
         # leaderboard
         leader_board_channel = self.bot.get_channel(config.leaderboard)
@@ -668,8 +858,12 @@ class QotdService:
         leaderboard_msg = await leader_board_channel.send(
             "Placeholder for leaderboard message"
         )
-        main_sheet[qotd_num_to_post, COLUMN["leaderboard"]] = str(leaderboard_msg.id)
-        main_sheet.commit()
+        # Read again, Sheet1 may have been merged with remote edits while posting.
+        row = self.catalog.get(main_sheet, qotd_num_to_post)
+        row.stats_msg = stats_msg_id
+        row.leaderboard_msg = leaderboard_msg.id
+        self.catalog.write(main_sheet, row)
+        await main_sheet.commit()
         await self._prune_logs()
         await self.logger.info("Daily question processing completed")
 
@@ -681,50 +875,36 @@ class QotdService:
         await qotd_logs.purge()
 
     async def _get_scores(self, user_id: str):
-        main_sheet = self.gss["Sheet1"]
-        scores: list[tuple[str, float]] = []
-        for user, score in self.gss["Leaderboard"].get_data():
-            if user == user_id:
-                scores.append(("Point adjustment", float(score)))
-        for num in range(1, len(main_sheet.get_data())):
-            if main_sheet[num, COLUMN["status"]] in ["active", "live"]:
-                ans = main_sheet[num, COLUMN["answer"]]
-                tolerance = main_sheet[num, COLUMN["tolerance"]]
-                qotd_sheet = self.gss[f"qotd {num}"]
-                stats = get_stats(qotd_sheet, ans, tolerance)
-                for user, *sub in qotd_sheet.get_data():
-                    if user == user_id:
-                        score, attempts = get_score(sub, ans, tolerance, stats)
-                        scores.append((f"Qotd {num}", score, attempts + 1))
-        scores.append(("Total", sum(k[1] for k in scores), sum(k[2] for k in scores)))
-        return scores
+        scoring = await self._sync_scoring()
+        return scoring.user_scores(user_id)
 
     async def end_season(self) -> None:
         """End the current season and reset the QOTD data."""
         async with self.lock:
             if self.is_end_season:
+                # Queued submissions go in before their sheets are deleted.
+                await self._commit_submissions()
                 await self._update_leaderboard_stats()
                 self.live_qotd = None
                 self.is_end_season = False
                 await self.logger.info("Ending the season")
-                main_sheet = self.gss["Sheet1"]
-                active_and_live = []
-                for num in range(1, len(main_sheet.get_data())):
-                    if main_sheet[num, COLUMN["status"]] in ["active", "live"]:
-                        active_and_live.append(num)
-                        main_sheet[num, COLUMN["status"]] = "done"
-                main_sheet.commit()
+                main_sheet = await self.gss.get("Sheet1")
+                active_and_live = main_sheet.find(COLUMN["status"], "active", "live")
+                for num in active_and_live:
+                    main_sheet[num, COLUMN["status"]] = "done"
+                await main_sheet.commit()
                 await self.logger.info("main sheet updated")
                 for num in active_and_live:
-                    del self.gss[f"qotd {num}"]
+                    await self.gss.delete_sheet(f"qotd {num}")
                 await self.logger.info("Deleted all active QOTD sheets")
-                self.gss["Leaderboard"].update_data([])
-                self.gss["Leaderboard"].commit()
-                data_sheet = self.gss["data"]
+                leaderboard_sheet = await self.gss.get("Leaderboard")
+                leaderboard_sheet.update_data([])
+                await leaderboard_sheet.commit()
+                data_sheet = await self.gss.get("data")
                 data_sheet[1, 2] = str(int(data_sheet[1, 2]) + 1)
                 data_sheet[1, 3] = "done"
                 data_sheet[1, 1] = "0"
-                data_sheet.commit()
+                await data_sheet.commit()
                 await self.logger.info("Data sheet updated for new season")
                 await utils.remove_roles(
                     self.bot.get_guild(config.phods).get_role(config.qotd_solver)
@@ -739,98 +919,144 @@ class QotdService:
                 return "Use the command again to end the season."
 
     async def _update_leaderboard_stats(self) -> bool:
+        render = await self._render_leaderboard()
+        if render is None:
+            return False
+        await self._publish_leaderboard(render, self._next_render())
+        return True
+
+    def _next_render(self) -> int:
+        """Number of a render just taken, call before releasing the lock it was taken under."""
+        self._renders += 1
+        return self._renders
+
+    async def _render_leaderboard(self) -> Optional[dict[str, Any]]:
+        """Everything the leaderboard message and the stats embed show, taken while
+        holding the lock so publishing can happen after releasing it."""
         await self.logger.info("Updating leaderboard stats")
-        qotd_num = self._get_live_qotd_num()
+        qotd_num = await self._get_live_qotd_num()
         if qotd_num is None:
             await self.logger.warning("No live QOTD for leaderboard update")
-            return False
+            return None
         await self.logger.info(f"Updating stats for live QOTD {qotd_num}")
-        main_sheet = self.gss["Sheet1"]
-        message = self.gss["data"][1, 0]
-        done_qotds = self.gss["data"][1, 1]
-        season = self.gss["data"][1, 2]
-        time = utils.get_time()
-        message = message.format(
-            qotd=qotd_num,
-            day=done_qotds,
-            season=season,
-            time=time,
-        )
+        main_sheet = await self.gss.get("Sheet1")
+        data_sheet = await self.gss.get("data")
         phods = self.bot.get_guild(config.phods)
         assert phods, "PHODS guild not found"
         qotd_banned_role = phods.get_role(config.qotd_banned)
         assert qotd_banned_role, "QOTD Banned role not found"
         qotd_banned_members = set(member.id for member in qotd_banned_role.members)
 
-        total_scores = {
-            user: float(score) for user, score in self.gss["Leaderboard"].get_data() if int(user) not in qotd_banned_members
+        scoring = await self._sync_scoring()
+        total_scores = scoring.totals(qotd_banned_members)
+        stats = scoring.qotds[qotd_num].stats
+        row = self.catalog.get(main_sheet, qotd_num)
+        assert row.leaderboard_msg is not None and row.stats_msg is not None, f"QOTD {qotd_num} has no posted messages"
+        return {
+            "qotd_num": qotd_num,
+            "template": data_sheet[1, 0],
+            "day": data_sheet[1, 1],
+            "season": data_sheet[1, 2],
+            "top": tuple(sorted(total_scores.items(), key=lambda x: float(x[1]), reverse=True)[:30]),
+            "creator": row.creator,
+            "stats": (
+                stats.base,
+                stats.weight_solves,
+                stats.num_participants,
+                stats.total_solves,
+                stats.total_attempts,
+            ),
+            "leaderboard_msg": row.leaderboard_msg,
+            "stats_msg": row.stats_msg,
         }
-        for num in range(1, len(main_sheet.get_data())):
-            if main_sheet[num, COLUMN["status"]] in ["active", "live"]:
-                ans = main_sheet[num, COLUMN["answer"]]
-                tolerance = main_sheet[num, COLUMN["tolerance"]]
-                qotd_sheet = self.gss[f"qotd {num}"]
-                scores, stats = grade(qotd_sheet, ans, tolerance, qotd_banned_members)
-                for user, points in scores.items():
-                    total_scores[user] = total_scores.get(user, 0.0) + points
-
-        for rank, (userid, point) in enumerate(
-            sorted(total_scores.items(), key=lambda x: float(x[1]), reverse=True)[:30],
-            start=1,
-        ):
+
+    async def _publish_leaderboard(self, render: dict[str, Any], number: int) -> None:
+        """Edit the leaderboard message and the stats embed, unless they already show
+        render or a newer one. Never waits for self.lock while holding _publish_lock."""
+        async with self._publish_lock:
+            if number <= self._published_render:
+                await self.logger.info("Newer leaderboard already published, skipping edit")
+                return
+            if render != self._published_leaderboard:
+                await self._edit_leaderboard(render)
+            else:
+                await self.logger.info("Leaderboard unchanged, skipping edit")
+            self._published_render = number
+
+    async def _edit_leaderboard(self, render: dict[str, Any]) -> None:
+        qotd_num = render["qotd_num"]
+        message = render["template"].format(
+            qotd=qotd_num,
+            day=render["day"],
+            season=render["season"],
+            time=utils.get_time(),
+        )
+        names = await self.user_directory.names(userid for userid, _ in render["top"])
+        for rank, (userid, point) in enumerate(render["top"], start=1):
             rank_dot = f"{rank}."
-            username = await self._get_user_name_or_id(userid)
+            username = names[userid]
             message += f"\n{rank_dot:4} {username[:29]:29} {float(point):.3f}"
         message += "\n```"
         leaderboard_channel = self.bot.get_channel(config.leaderboard)
         assert isinstance(
             leaderboard_channel, discord.TextChannel
         ), "Leaderboard channel not found"
-        leaderboard_msg = await leaderboard_channel.fetch_message(
-            int(main_sheet[qotd_num, COLUMN["leaderboard"]])
-        )
-        await leaderboard_msg.edit(content=message)
+        # Partial messages edit by id, without fetching the message first.
+        await leaderboard_channel.get_partial_message(render["leaderboard_msg"]).edit(content=message)
         question_of_the_day = self.bot.get_channel(config.question_of_the_day)
         assert isinstance(
             question_of_the_day, discord.TextChannel
         ), "Question of the Day channel not found"
-        stats_msg = await question_of_the_day.fetch_message(
-            int(main_sheet[qotd_num, COLUMN["stats"]])
-        )
+        base, weight_solves, num_participants, total_solves, total_attempts = render["stats"]
         stats_embed = get_statistics_embed(
             num=qotd_num,
-            creator=main_sheet[qotd_num, COLUMN["creator"]],
-            base=stats.base,
-            weighted_solves=stats.weight_solves,
-            num_participants=stats.num_participants,
-            solves_official=stats.total_solves,
-            total_attempts=stats.total_attempts,
+            creator=render["creator"],
+            base=base,
+            weighted_solves=weight_solves,
+            num_participants=num_participants,
+            solves_official=total_solves,
+            total_attempts=total_attempts,
         )
-        await stats_msg.edit(embed=stats_embed)
+        await question_of_the_day.get_partial_message(render["stats_msg"]).edit(embed=stats_embed)
+        self._published_leaderboard = render
         await self.logger.info("Leaderboard stats updated")
-        return True
 
-    async def _get_user_name_or_id(self, user_id: str) -> str:
-        if user_id in self.users:
-            return self.users[user_id]
+    async def publish_leaderboard(self) -> None:
+        """Re-render the leaderboard if a submission changed it since the last run."""
+        if not self._leaderboard_dirty:
+            return
+        self._leaderboard_dirty = False
         try:
-            user = await self.bot.fetch_user(int(user_id))
-            self.users[user_id] = str(user)
-            return str(user)
-        except discord.NotFound:
-            self.users[user_id] = user_id
-            await self.logger.warning(f"User not found: {user_id}")
-            return user_id
-        except Exception as e:
-            await self.logger.error(f"Error fetching user {user_id}: {e}, e")
-            return user_id
+            async with self.lock.read(Priority.BACKGROUND):
+                with sheet_priority(Priority.BACKGROUND):
+                    render = await self._render_leaderboard()
+                number = self._next_render()
+            if render is not None:
+                await self._publish_leaderboard(render, number)
+        except Exception:
+            self._leaderboard_dirty = True
+            raise
+
+    async def _sync_scoring(self) -> ScoringEngine:
+        """Bring the scoring engine up to date with the sheets, regrading only the
+        QOTDs whose sheet, answer or tolerance changed."""
+        main_sheet = await self.gss.get("Sheet1")
+        leaderboard_sheet = await self.gss.get("Leaderboard")
+        self.scoring.sync_adjustments(leaderboard_sheet)
+        self.scoring.set_live(await self._get_live_qotd_num())
+        nums = main_sheet.find(COLUMN["status"], "active", "live")
+        self.scoring.retain(set(nums))
+        self.gss.pin_all((f"qotd {num}" for num in nums), slot="scoring")
+        for num in nums:
+            qotd_sheet = await self.gss.get(f"qotd {num}")
+            row = self.catalog.get(main_sheet, num)
+            self.scoring.sync_qotd(num, qotd_sheet, row.answer, row.tolerance)
+        return self.scoring
 
-    def _get_live_qotd_num(self) -> Optional[int]:
+    async def _get_live_qotd_num(self) -> Optional[int]:
         if self.live_qotd is not None:
             return self.live_qotd
-        main_sheet = self.gss["Sheet1"]
-        for num in range(1, len(main_sheet.get_data())):
-            if main_sheet[num, COLUMN["status"]] == "live":
-                self.live_qotd = num
-                return num
-        return None
+        main_sheet = await self.gss.get("Sheet1")
+        self.live_qotd = main_sheet.find_first(COLUMN["status"], "live")
+        self.gss.pin(f"qotd {self.live_qotd}" if self.live_qotd is not None else None, slot="live")
+        return self.live_qotd
@@ -0,0 +1,131 @@
+import asyncio
+import contextlib
+import heapq
+import itertools
+import math
+import time
+from typing import AsyncIterator, Optional, Sequence
+
+from services.google_sheet_service import Priority, current_priority
+
+
+class Busy(Exception):
+    """Raised instead of waiting when the queue of a priority is full."""
+
+    def __init__(self, retry_after: int) -> None:
+        super().__init__(f"Busy, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+class ReadWriteLock:
+    """asyncio lock shared by any number of readers or held by one writer.
+    `async with lock:` or `lock.write()` takes it exclusively, `lock.read()` shares it.
+    Waiters are served by priority, by default that of the sheet_priority() around them,
+    then in arrival order. limits[priority] bounds how many may wait at once, the next
+    one gets Busy."""
+
+    # Weight of the latest hold time in the average used for Busy.retry_after.
+    HOLD_SMOOTHING = 0.2
+
+    def __init__(self, limits: Optional[Sequence[int]] = None) -> None:
+        self.limits = limits
+        self._readers = 0
+        self._writer = False
+        # (priority, arrival, is writer, future resolved when the lock is granted)
+        self._waiters: list[tuple[Priority, int, bool, asyncio.Future]] = []
+        self._arrivals = itertools.count()
+        self._queued = [0] * len(Priority)
+        self._hold = 1.0
+        self._write_started = 0.0
+
+    def locked(self) -> bool:
+        return self._writer or self._readers > 0
+
+    def depth(self) -> dict[str, int]:
+        """Commands waiting for the lock, by priority."""
+        return {priority.name.lower(): self._queued[priority] for priority in Priority}
+
+    def _retry_after(self, priority: Priority) -> int:
+        ahead = sum(self._queued[: priority + 1])
+        return max(1, math.ceil(self._hold * (ahead + 1)))
+
+    def _grant(self, write: bool) -> None:
+        if write:
+            self._writer = True
+            self._write_started = time.monotonic()
+        else:
+            self._readers += 1
+
+    def _wake(self) -> None:
+        while self._waiters:
+            _, _, write, waiter = self._waiters[0]
+            if waiter.done():
+                # Cancelled while waiting.
+                heapq.heappop(self._waiters)
+                continue
+            if self._writer or (write and self._readers):
+                return
+            heapq.heappop(self._waiters)
+            self._grant(write)
+            waiter.set_result(None)
+
+    async def _acquire(self, write: bool, priority: Optional[Priority] = None) -> None:
+        if not self._waiters and not self._writer and not (write and self._readers):
+            self._grant(write)
+            return
+        if priority is None:
+            priority = current_priority()
+        if self.limits is not None and self._queued[priority] >= self.limits[priority]:
+            raise Busy(self._retry_after(priority))
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._arrivals), write, waiter))
+        self._queued[priority] += 1
+        try:
+            # Entries left by cancelled waiters may be all that blocks it.
+            self._wake()
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Granted just before the cancellation arrived.
+                self._release(write)
+            else:
+                self._wake()
+            raise
+        finally:
+            self._queued[priority] -= 1
+
+    def _release(self, write: bool) -> None:
+        if write:
+            self._writer = False
+        else:
+            self._readers -= 1
+        self._wake()
+
+    def _held(self, started: float) -> None:
+        self._hold += self.HOLD_SMOOTHING * (time.monotonic() - started - self._hold)
+
+    @contextlib.asynccontextmanager
+    async def read(self, priority: Optional[Priority] = None) -> AsyncIterator[None]:
+        await self._acquire(False, priority)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._held(started)
+            self._release(False)
+
+    @contextlib.asynccontextmanager
+    async def write(self, priority: Optional[Priority] = None) -> AsyncIterator[None]:
+        await self._acquire(True, priority)
+        try:
+            yield
+        finally:
+            self._held(self._write_started)
+            self._release(True)
+
+    async def __aenter__(self) -> None:
+        await self._acquire(True)
+
+    async def __aexit__(self, *exc_info) -> None:
+        self._held(self._write_started)
+        self._release(True)
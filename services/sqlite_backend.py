@@ -0,0 +1,120 @@
+import asyncio
+import os
+import sqlite3
+import threading
+from typing import Any, Callable, Optional
+from services.storage_backend import Block, SheetNotFound, StorageBackend
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sheets (
+    name TEXT PRIMARY KEY
+);
+CREATE TABLE IF NOT EXISTS cells (
+    sheet TEXT NOT NULL,
+    row INTEGER NOT NULL,
+    col INTEGER NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (sheet, row, col)
+);
+"""
+
+
+class SQLiteBackend(StorageBackend):
+    """Sheets stored as non-blank cells in a local SQLite file."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def _run(self, fn: Callable[[sqlite3.Connection], Any]) -> Any:
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                return fn(conn)
+
+    async def _call(self, fn: Callable[[sqlite3.Connection], Any]) -> Any:
+        return await asyncio.to_thread(self._run, fn)
+
+    @staticmethod
+    def _grid(cells: list[tuple[int, int, str]]) -> list[list[str]]:
+        grid: list[list[str]] = []
+        for row, col, value in cells:
+            while len(grid) <= row:
+                grid.append([])
+            values = grid[row]
+            while len(values) < col:
+                values.append("")
+            values.append(value)
+        return grid
+
+    def _load(self, conn: sqlite3.Connection, sheet_name: str) -> list[list[str]]:
+        if conn.execute("SELECT 1 FROM sheets WHERE name = ?", (sheet_name,)).fetchone() is None:
+            raise SheetNotFound(sheet_name)
+        cells = conn.execute(
+            "SELECT row, col, value FROM cells WHERE sheet = ? ORDER BY row, col", (sheet_name,)
+        ).fetchall()
+        return self._grid(cells)
+
+    async def load(self, sheet_name: str) -> list[list[str]]:
+        return await self._call(lambda conn: self._load(conn, sheet_name))
+
+    async def load_rows(self, sheet_name: str, start: int, end: int) -> list[list[str]]:
+        def load_rows(conn: sqlite3.Connection) -> list[list[str]]:
+            if conn.execute("SELECT 1 FROM sheets WHERE name = ?", (sheet_name,)).fetchone() is None:
+                raise SheetNotFound(sheet_name)
+            cells = conn.execute(
+                "SELECT row - ?, col, value FROM cells WHERE sheet = ? AND row >= ? AND row < ? ORDER BY row, col",
+                (start, sheet_name, start, end),
+            ).fetchall()
+            return self._grid(cells)
+
+        return await self._call(load_rows)
+
+    async def load_many(
+        self, sheet_names: Optional[set[str]], exclude: set[str]
+    ) -> dict[str, list[list[str]]]:
+        def load_many(conn: sqlite3.Connection) -> dict[str, list[list[str]]]:
+            names = [name for (name,) in conn.execute("SELECT name FROM sheets")]
+            return {
+                name: self._load(conn, name)
+                for name in names
+                if (sheet_names is None or name in sheet_names) and name not in exclude
+            }
+
+        return await self._call(load_many)
+
+    async def write(self, blocks: list[Block]) -> None:
+        def write(conn: sqlite3.Connection) -> None:
+            upserts = []
+            deletes = []
+            for sheet_name, row, col, values in blocks:
+                for r, row_values in enumerate(values):
+                    for c, value in enumerate(row_values):
+                        if value:
+                            upserts.append((sheet_name, row + r, col + c, value))
+                        else:
+                            deletes.append((sheet_name, row + r, col + c))
+            conn.executemany("DELETE FROM cells WHERE sheet = ? AND row = ? AND col = ?", deletes)
+            conn.executemany("INSERT OR REPLACE INTO cells VALUES (?, ?, ?, ?)", upserts)
+
+        await self._call(write)
+
+    async def create(self, sheet_name: str) -> None:
+        await self._call(lambda conn: conn.execute("INSERT OR IGNORE INTO sheets VALUES (?)", (sheet_name,)))
+
+    async def delete(self, sheet_name: str) -> None:
+        def delete(conn: sqlite3.Connection) -> None:
+            conn.execute("DELETE FROM cells WHERE sheet = ?", (sheet_name,))
+            conn.execute("DELETE FROM sheets WHERE name = ?", (sheet_name,))
+
+        await self._call(delete)
@@ -0,0 +1,156 @@
+from typing import Optional
+
+# (sheet name, first row, first col, values) with 0-based row and col.
+Block = tuple[str, int, int, list[list[str]]]
+
+
+class SheetNotFound(KeyError):
+    pass
+
+
+class MirrorOpsDropped(Exception):
+    """Raised by MirroredBackend.sync() once the rest of the queue is synced, when the
+    mirror rejected some operations for good. The mirror misses them from then on."""
+
+
+class StorageBackend:
+    """Where LocalSheet grids are loaded from and written to.
+    Cells are strings, an empty string means the cell is blank."""
+
+    async def load(self, sheet_name: str) -> list[list[str]]:
+        """Return the grid of a sheet, raise SheetNotFound if it does not exist."""
+        raise NotImplementedError
+
+    async def load_many(
+        self, sheet_names: Optional[set[str]], exclude: set[str]
+    ) -> dict[str, list[list[str]]]:
+        """Return the grids of sheet_names (every sheet if None), skipping exclude."""
+        raise NotImplementedError
+
+    async def load_rows(self, sheet_name: str, start: int, end: int) -> list[list[str]]:
+        """Return rows start..end (0-based, end excluded) of a sheet, fewer if it is shorter."""
+        return (await self.load(sheet_name))[start:end]
+
+    async def revision(self) -> Optional[str]:
+        """A marker that changes whenever any sheet changes, None if unknown."""
+        return None
+
+    async def write(self, blocks: list[Block]) -> None:
+        raise NotImplementedError
+
+    async def create(self, sheet_name: str) -> None:
+        raise NotImplementedError
+
+    async def delete(self, sheet_name: str) -> None:
+        """Delete a sheet, missing sheets are ignored."""
+        raise NotImplementedError
+
+    async def sync(self) -> None:
+        """Push anything the backend buffered itself. Called on every flush."""
+
+    def is_permanent(self, error: Exception) -> bool:
+        """Whether a call that raised error would fail the same way however often it is retried."""
+        return isinstance(error, SheetNotFound)
+
+    async def exists(self, sheet_name: str) -> bool:
+        try:
+            await self.load_rows(sheet_name, 0, 1)
+        except SheetNotFound:
+            return False
+        return True
+
+
+def grid_blocks(sheet_name: str, data: list[list[str]]) -> list[Block]:
+    return [(sheet_name, row, 0, [values]) for row, values in enumerate(data) if values]
+
+
+class MirroredBackend(StorageBackend):
+    """Serve reads and writes from primary and replay them to mirror on sync().
+    Sheets missing from primary are imported from mirror the first time they are read."""
+
+    def __init__(self, primary: StorageBackend, mirror: StorageBackend) -> None:
+        self.primary = primary
+        self.mirror = mirror
+        # Operations not yet applied to the mirror, in order: ("write", blocks) / ("create" | "delete", name)
+        self._queue: list[tuple[str, object]] = []
+
+    async def _import(self, sheet_name: str, data: list[list[str]]) -> None:
+        await self.primary.create(sheet_name)
+        await self.primary.write(grid_blocks(sheet_name, data))
+
+    async def load(self, sheet_name: str) -> list[list[str]]:
+        try:
+            return await self.primary.load(sheet_name)
+        except SheetNotFound:
+            data = await self.mirror.load(sheet_name)
+            await self._import(sheet_name, data)
+            return data
+
+    async def load_rows(self, sheet_name: str, start: int, end: int) -> list[list[str]]:
+        return await self.primary.load_rows(sheet_name, start, end)
+
+    async def revision(self) -> Optional[str]:
+        return await self.primary.revision()
+
+    async def load_many(
+        self, sheet_names: Optional[set[str]], exclude: set[str]
+    ) -> dict[str, list[list[str]]]:
+        sheets = await self.primary.load_many(sheet_names, exclude)
+        if sheet_names is not None:
+            missing: Optional[set[str]] = sheet_names - exclude - sheets.keys()
+        else:
+            # An empty primary has never been seeded, take everything from the mirror.
+            missing = None if not sheets else set()
+        if missing is None or missing:
+            imported = await self.mirror.load_many(missing, exclude | sheets.keys())
+            for sheet_name, data in imported.items():
+                await self._import(sheet_name, data)
+            sheets.update(imported)
+        return sheets
+
+    async def write(self, blocks: list[Block]) -> None:
+        await self.primary.write(blocks)
+        if self._queue and self._queue[-1][0] == "write":
+            self._queue[-1][1].extend(blocks)  # type: ignore
+        else:
+            self._queue.append(("write", list(blocks)))
+
+    async def create(self, sheet_name: str) -> None:
+        await self.primary.create(sheet_name)
+        self._queue.append(("create", sheet_name))
+
+    async def delete(self, sheet_name: str) -> None:
+        await self.primary.delete(sheet_name)
+        self._queue.append(("delete", sheet_name))
+
+    async def _create_in_mirror(self, sheet_name: str) -> None:
+        try:
+            await self.mirror.create(sheet_name)
+        except Exception:
+            # Primary only creates what it lacked, the mirror may have had it all along.
+            if not await self.mirror.exists(sheet_name):
+                raise
+
+    async def sync(self) -> None:
+        dropped = []
+        while self._queue:
+            # Taken off the queue first so writes made meanwhile are not merged into it.
+            op, arg = self._queue.pop(0)
+            try:
+                if op == "write":
+                    await self.mirror.write(arg)  # type: ignore
+                elif op == "create":
+                    await self._create_in_mirror(arg)  # type: ignore
+                else:
+                    await self.mirror.delete(arg)  # type: ignore
+            except Exception as e:
+                if self.mirror.is_permanent(e):
+                    # Retrying would only hold back everything queued behind it.
+                    target = ", ".join(sorted({block[0] for block in arg})) if op == "write" else arg  # type: ignore
+                    dropped.append(f"{op} {target}: {e}")
+                    continue
+                self._queue.insert(0, (op, arg))
+                raise
+        await self.mirror.sync()
+        if dropped:
+            raise MirrorOpsDropped("; ".join(dropped))
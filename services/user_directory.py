@@ -0,0 +1,100 @@
+import asyncio
+import json
+import os
+import time
+from typing import Iterable, Optional
+
+import discord
+from discord.ext import commands
+
+import config
+
+
+class UserDirectory:
+    """User id -> name for leaderboards, shared by every service.
+    Names come from the PHODS member cache, then the bot's user cache, then a
+    file of earlier fetches kept for config.user_name_ttl seconds. Only what is
+    left is fetched, concurrently but at most `concurrency` at a time."""
+
+    def __init__(self, bot: commands.Bot, path: str, ttl: float, concurrency: int = 8) -> None:
+        self.bot = bot
+        self.path = path
+        self.ttl = ttl
+        self._semaphore = asyncio.Semaphore(concurrency)
+        # user id -> (name, time.time() it was fetched)
+        self._fetched: dict[str, tuple[str, float]] = self._load()
+
+    def _load(self) -> dict[str, tuple[str, float]]:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return {user_id: (name, fetched_at) for user_id, (name, fetched_at) in json.load(f).items()}
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _save(self, fetched: dict[str, tuple[str, float]]) -> None:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(fetched, f)
+        os.replace(tmp_path, self.path)
+
+    def cached(self, user_id: str) -> Optional[str]:
+        """The name of user_id if it can be had without a REST call."""
+        phods = self.bot.get_guild(config.phods)
+        member = phods.get_member(int(user_id)) if phods else None
+        if member is not None:
+            return str(member)
+        user = self.bot.get_user(int(user_id))
+        if user is not None:
+            return str(user)
+        entry = self._fetched.get(user_id)
+        if entry is not None and time.time() - entry[1] < self.ttl:
+            return entry[0]
+        return None
+
+    async def _fetch(self, user_id: str) -> Optional[str]:
+        async with self._semaphore:
+            try:
+                user = await self.bot.fetch_user(int(user_id))
+                return str(user)
+            except discord.NotFound:
+                # Deleted accounts keep their id, remembered so they are not fetched again.
+                return user_id
+            except Exception:
+                return None
+
+    async def names(self, user_ids: Iterable[str]) -> dict[str, str]:
+        """Names of user_ids, falling back to the id when it cannot be resolved."""
+        names: dict[str, str] = {}
+        misses = []
+        for user_id in dict.fromkeys(user_ids):
+            name = self.cached(user_id)
+            if name is None:
+                misses.append(user_id)
+            else:
+                names[user_id] = name
+        if misses:
+            fetched = await asyncio.gather(*(self._fetch(user_id) for user_id in misses))
+            now = time.time()
+            for user_id, name in zip(misses, fetched):
+                if name is not None:
+                    self._fetched[user_id] = (name, now)
+                names[user_id] = name or user_id
+            await asyncio.to_thread(self._save, dict(self._fetched))
+        return names
+
+    async def name(self, user_id: str) -> str:
+        return (await self.names([user_id]))[user_id]
+
+
+_directory: Optional[UserDirectory] = None
+
+
+def user_directory(bot: commands.Bot) -> UserDirectory:
+    """The UserDirectory of the process, created on first use."""
+    global _directory
+    if _directory is None:
+        _directory = UserDirectory(
+            bot, os.path.join(config.storage_dir, "users.json"), config.user_name_ttl
+        )
+    return _directory
@@ -0,0 +1,89 @@
+import enum
+from typing import Any, Callable, Generic, Optional, TypeVar
+
+from services.google_sheet_service import LocalSheet
+
+
+class Status(str, enum.Enum):
+    """Status column of a catalog sheet. Compares equal to the cell text."""
+
+    PENDING = "pending"
+    LIVE = "live"
+    ACTIVE = "active"
+    DONE = "done"
+
+
+def parse_status(value: str) -> Optional[Status]:
+    try:
+        return Status(value)
+    except ValueError:
+        return None
+
+
+def parse_float(value: str) -> Optional[float]:
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+def parse_int(value: str) -> Optional[int]:
+    try:
+        return int(value)
+    except ValueError:
+        return None
+
+
+def format_cell(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, Status):
+        return value.value
+    return str(value)
+
+
+class CatalogRow:
+    """One row of a catalog sheet with its cells parsed.
+    Subclasses list their fields in FIELDS as (attribute, column, parser)."""
+
+    __slots__ = ("num",)
+    FIELDS: tuple[tuple[str, int, Callable[[str], Any]], ...] = ()
+
+    @classmethod
+    def from_sheet(cls, sheet: LocalSheet, num: int):
+        row = cls.__new__(cls)
+        row.num = num
+        for attr, col, parse in cls.FIELDS:
+            setattr(row, attr, parse(sheet[num, col]))
+        return row
+
+
+R = TypeVar("R", bound=CatalogRow)
+
+
+class RowMapper(Generic[R]):
+    """Typed rows of a catalog sheet, each parsed once per sheet version.
+    Rows are shared between callers, change them only to write() them back."""
+
+    def __init__(self, row_type: type[R]) -> None:
+        self.row_type = row_type
+        self._sheet: Optional[LocalSheet] = None
+        self._version = -1
+        self._rows: dict[int, R] = {}
+
+    def get(self, sheet: LocalSheet, num: int) -> R:
+        if sheet is not self._sheet or sheet.version != self._version:
+            self._sheet = sheet
+            self._version = sheet.version
+            self._rows = {}
+        row = self._rows.get(num)
+        if row is None:
+            row = self._rows[num] = self.row_type.from_sheet(sheet, num)
+        return row
+
+    def write(self, sheet: LocalSheet, row: R) -> None:
+        """Set the cells of the fields that differ from the sheet, the rest keep their text."""
+        for attr, col, parse in self.row_type.FIELDS:
+            value = getattr(row, attr)
+            if parse(sheet[row.num, col]) != value:
+                sheet[row.num, col] = format_cell(value)
@@ -3,6 +3,7 @@ from typing import Optional, Any, Union
 from utils import utils
 from datetime import datetime, timezone
 from services.google_sheet_service import LocalSheet
+from utils.catalog_utils import CatalogRow, Status, parse_int, parse_status
 import config
 import discord
 
@@ -22,11 +23,44 @@ COLUMN = {
 }
 
 
+class PotdRow(CatalogRow):
+    """A Sheet1 row, read through RowMapper instead of parsing cells per call."""
+
+    __slots__ = (
+        "potd_num", "date", "day", "creator", "source", "points", "problem_path", "topic",
+        "difficulty", "solution", "status", "leaderboard_msg",
+    )
+    FIELDS = (
+        ("potd_num", COLUMN["potd_num"], str),
+        ("date", COLUMN["date"], str),
+        ("day", COLUMN["day"], str),
+        ("creator", COLUMN["creator"], str),
+        ("source", COLUMN["source"], str),
+        ("points", COLUMN["points"], str),
+        ("problem_path", COLUMN["problem path"], str),
+        ("topic", COLUMN["topic"], str),
+        ("difficulty", COLUMN["difficulty"], str),
+        ("solution", COLUMN["solution"], str),
+        ("status", COLUMN["status"], parse_status),
+        ("leaderboard_msg", COLUMN["leaderboard"], parse_int),
+    )
+
+    potd_num: str
+    date: str
+    day: str
+    creator: str
+    source: str
+    points: str
+    problem_path: str
+    topic: str
+    difficulty: str
+    solution: str
+    status: Optional[Status]
+    leaderboard_msg: Optional[int]
+
+
 def get_potd_num_to_post(main_sheet) -> Optional[int]:
-    for num in range(1, len(main_sheet.get_data())):
-        if main_sheet[num, COLUMN["status"]] == "pending":
-            return num
-    return None
+    return main_sheet.find_first(COLUMN["status"], "pending")
 
 
 
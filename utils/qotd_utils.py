@@ -3,6 +3,7 @@ from typing import Optional, Any, Union
 from utils import utils
 from datetime import datetime, timezone
 from services.google_sheet_service import LocalSheet
+from utils.catalog_utils import CatalogRow, Status, parse_float, parse_int, parse_status
 import config
 import discord
 
@@ -26,6 +27,48 @@ COLUMN = {
 A1, a1, B1, b1 = 8.90125, -0.0279323, 24.6239, -0.402639
 
 
+class QotdRow(CatalogRow):
+    """A Sheet1 row, read through RowMapper instead of parsing cells per call."""
+
+    __slots__ = (
+        "qotd_num", "date", "day", "creator", "source", "points", "question_path", "topic",
+        "difficulty", "solution", "answer", "tolerance", "status", "stats_msg", "leaderboard_msg",
+    )
+    FIELDS = (
+        ("qotd_num", COLUMN["qotd_num"], str),
+        ("date", COLUMN["date"], str),
+        ("day", COLUMN["day"], str),
+        ("creator", COLUMN["creator"], str),
+        ("source", COLUMN["source"], str),
+        ("points", COLUMN["points"], str),
+        ("question_path", COLUMN["question path"], str),
+        ("topic", COLUMN["topic"], str),
+        ("difficulty", COLUMN["difficulty"], str),
+        ("solution", COLUMN["solution"], str),
+        ("answer", COLUMN["answer"], parse_float),
+        ("tolerance", COLUMN["tolerance"], parse_float),
+        ("status", COLUMN["status"], parse_status),
+        ("stats_msg", COLUMN["stats"], parse_int),
+        ("leaderboard_msg", COLUMN["leaderboard"], parse_int),
+    )
+
+    qotd_num: str
+    date: str
+    day: str
+    creator: str
+    source: str
+    points: str
+    question_path: str
+    topic: str
+    difficulty: str
+    solution: str
+    answer: Optional[float]
+    tolerance: Optional[float]
+    status: Optional[Status]
+    stats_msg: Optional[int]
+    leaderboard_msg: Optional[int]
+
+
 class Stats:
     def __init__(
         self,
@@ -52,37 +95,92 @@ class Stats:
 
 
 def get_qotd_num_to_post(main_sheet) -> Optional[int]:
-    for num in range(1, len(main_sheet.get_data())):
-        if main_sheet[num, COLUMN["status"]] == "pending":
-            return num
-    return None
+    return main_sheet.find_first(COLUMN["status"], "pending")
 
 
 def is_correct_answer(correct_ans: float, answer: float, tolerance: float = 1) -> bool:
     return abs(correct_ans - answer) <= abs(correct_ans * tolerance / 100.0)
 
 
-def get_stats(qotd_sheet: LocalSheet, correct_ans: str, tolerance: str):
-    stats = Stats()
-    for user, *submissions in qotd_sheet.get_data():
-        stats.total_attempts += len(submissions)
-        stats.num_participants += 1
-        attempts = 0
-        for his_ans in submissions:
-            if is_correct_answer(float(correct_ans), float(his_ans), float(tolerance)):
-                if attempts <= 5:
-                    stats.weight_solves += 0.8**attempts
-                stats.total_solves += 1
-                break
-            attempts += 1
+# 0.8**attempts for the attempts that score, the same floats Stats.get_score uses.
+DECAY = np.array([0.8**attempts for attempts in range(6)])
+
+
+class GradedRows:
+    """Result of grade_rows(), one entry per sheet row."""
+
+    def __init__(
+        self,
+        users: list[str],
+        lengths: np.ndarray,
+        first_correct: np.ndarray,
+        stats: Stats,
+        scores: np.ndarray,
+        attempts: np.ndarray,
+    ):
+        self.users = users
+        # number of submissions
+        self.lengths = lengths
+        # index of the first correct submission, -1 if none
+        self.first_correct = first_correct
+        self.stats = stats
+        # what get_score() returns for the row
+        self.scores = scores
+        self.attempts = attempts
+
+
+def answer_value(ans: str) -> float:
+    """float(ans), or NaN for a cell that is not a number, which never grades as correct."""
+    try:
+        return float(ans)
+    except (TypeError, ValueError):
+        return float("nan")
+
+
+def grade_rows(rows: list[list[str]], correct_ans: Union[str, float], tolerance: Union[str, float]) -> GradedRows:
+    """Grade a whole qotd sheet with array operations. Gives the same floats as
+    get_stats() and get_score() row by row, weight_solves is summed in row order."""
+    n = len(rows)
+    users = [row[0] for row in rows]
+    lengths = np.fromiter((len(row) - 1 for row in rows), dtype=np.int64, count=n)
+    width = int(lengths.max()) if n else 0
+    submissions = np.full((n, width), np.nan)
+    if width:
+        filled = np.arange(width) < lengths[:, None]
+        # Parsed like the scalar path so every value is exactly what it sees.
+        submissions[filled] = np.fromiter(
+            (answer_value(ans) for row in rows for ans in row[1:]), dtype=np.float64, count=int(lengths.sum())
+        )
+    correct_ans_f = float(correct_ans)
+    # Padding is NaN, which never compares as correct.
+    correct = np.abs(correct_ans_f - submissions) <= abs(correct_ans_f * float(tolerance) / 100.0)
+    solved = correct.any(axis=1)
+    first_correct = np.where(solved, correct.argmax(axis=1), -1) if width else np.full(n, -1)
+    scoring = solved & (first_correct <= 5)
+
+    stats = Stats(
+        total_solves=int(solved.sum()),
+        total_attempts=int(lengths.sum()),
+        num_participants=n,
+    )
+    weights = DECAY[first_correct[scoring]]
+    if weights.size:
+        # Sequential like the += loop, np.sum would add pairwise.
+        stats.weight_solves = float(np.add.accumulate(weights)[-1])
     stats.calc_base()
-    return stats
+    scores = np.where(scoring, stats.base * DECAY[np.where(scoring, first_correct, 0)], 0.0)
+    attempts = np.where(scoring, first_correct, lengths)
+    return GradedRows(users, lengths, first_correct, stats, scores, attempts)
+
+
+def get_stats(qotd_sheet: LocalSheet, correct_ans: str, tolerance: str):
+    return grade_rows(qotd_sheet.get_data(), correct_ans, tolerance).stats
 
 
 def get_score(submissions: list[str], correct_ans: str, tolerance: str, stats: Stats):
     attempts = 0
     for his_ans in submissions:
-        if is_correct_answer(float(correct_ans), float(his_ans), float(tolerance)):
+        if is_correct_answer(float(correct_ans), answer_value(his_ans), float(tolerance)):
             if attempts <= 5:
                 return stats.get_score(attempts), attempts
         attempts += 1
@@ -90,13 +188,200 @@ def get_score(submissions: list[str], correct_ans: str, tolerance: str, stats: S
 
 
 def grade(qotd_sheet: LocalSheet, correct_ans: str, tolerance: str, qotd_banned_members: set[int]):
-    stats = get_stats(qotd_sheet, correct_ans, tolerance)
+    graded = grade_rows(qotd_sheet.get_data(), correct_ans, tolerance)
     scores = {
-        user: get_score(sub, correct_ans, tolerance, stats)[0]
-        for user, *sub in qotd_sheet.get_data()
+        user: score
+        for user, score in zip(graded.users, graded.scores.tolist())
         if int(user) not in qotd_banned_members
     }
-    return scores, stats
+    return scores, graded.stats
+
+
+class QotdScores:
+    """Grading state of one QOTD, updated one attempt at a time.
+    Fed the sheet rows in order it yields the same Stats as get_stats()."""
+
+    def __init__(self, correct_ans: float, tolerance: float, version: int = -1) -> None:
+        self.correct_ans = correct_ans
+        self.tolerance = tolerance
+        self._correct_ans = float(correct_ans)
+        self._tolerance = float(tolerance)
+        # LocalSheet.version of the qotd sheet this state was built from.
+        self.version = version
+        self.stats = Stats()
+        self.stats.calc_base()
+        self.attempts: dict[str, int] = {}
+        # user -> index of the first correct attempt, only when it scores (at most 5)
+        self.solved_at: dict[str, int] = {}
+        self._solved: set[str] = set()
+
+    @classmethod
+    def from_rows(cls, rows: list[list[str]], correct_ans: float, tolerance: float, version: int = -1) -> "QotdScores":
+        scores = cls(correct_ans, tolerance, version)
+        graded = grade_rows(rows, correct_ans, tolerance)
+        scores.stats = graded.stats
+        for user, length, first_correct in zip(graded.users, graded.lengths.tolist(), graded.first_correct.tolist()):
+            scores.attempts[user] = scores.attempts.get(user, 0) + length
+            if first_correct >= 0:
+                scores._solved.add(user)
+                if first_correct <= 5:
+                    scores.solved_at.setdefault(user, first_correct)
+        return scores
+
+    def add(self, user: str, his_ans: str) -> None:
+        attempts = self.attempts.get(user)
+        if attempts is None:
+            self.stats.num_participants += 1
+            attempts = 0
+        self.attempts[user] = attempts + 1
+        self.stats.total_attempts += 1
+        if user in self._solved:
+            return
+        if is_correct_answer(self._correct_ans, answer_value(his_ans), self._tolerance):
+            self._solved.add(user)
+            self.stats.total_solves += 1
+            if attempts <= 5:
+                self.solved_at[user] = attempts
+                self.stats.weight_solves += 0.8**attempts
+                self.stats.calc_base()
+
+    def score(self, user: str) -> float:
+        attempts = self.solved_at.get(user)
+        return 0 if attempts is None else self.stats.get_score(attempts)
+
+    def result(self, user: str) -> tuple[float, int]:
+        """(score, attempts) of user, as get_score() returns them."""
+        attempts = self.solved_at.get(user)
+        if attempts is None:
+            return 0, self.attempts[user]
+        return self.stats.get_score(attempts), attempts
+
+
+class ScoringEngine:
+    """Season totals kept in memory and updated per submission instead of regrading.
+
+    A total is the Leaderboard adjustment plus base * 0.8**attempts summed over the
+    QOTDs. Only the live QOTD's base moves with new solves, so everything else is
+    summed once into a fixed part and a total costs fixed + one live score."""
+
+    def __init__(self) -> None:
+        self.qotds: dict[int, QotdScores] = {}
+        self.live: Optional[int] = None
+        self.adjustments: dict[str, float] = {}
+        # user -> every Leaderboard row of theirs, listed separately by user_scores()
+        self.adjustment_rows: dict[str, list[float]] = {}
+        self._adjustments_version: int = -1
+        # user -> adjustment plus points from every QOTD but the live one, None when stale
+        self._fixed: Optional[dict[str, float]] = None
+        # user -> QOTDs they submitted to
+        self._user_qotds: dict[str, set[int]] = {}
+        # user -> (cache key, user_scores() result)
+        self._user_scores: dict[str, tuple[tuple, list[tuple[str, float, int]]]] = {}
+
+    def sync_adjustments(self, leaderboard_sheet: LocalSheet) -> None:
+        if leaderboard_sheet.version == self._adjustments_version:
+            return
+        self.adjustments = {user: float(score) for user, score in leaderboard_sheet.get_data()}
+        self.adjustment_rows = {}
+        for user, score in leaderboard_sheet.get_data():
+            self.adjustment_rows.setdefault(user, []).append(float(score))
+        self._adjustments_version = leaderboard_sheet.version
+        self._fixed = None
+
+    def sync_qotd(self, num: int, qotd_sheet: LocalSheet, correct_ans: float, tolerance: float) -> QotdScores:
+        """Regrade num only if its sheet, answer or tolerance changed since last time."""
+        scores = self.qotds.get(num)
+        if (
+            scores is None
+            or scores.version != qotd_sheet.version
+            or scores.correct_ans != correct_ans
+            or scores.tolerance != tolerance
+        ):
+            self._drop(num)
+            scores = QotdScores.from_rows(qotd_sheet.get_data(), correct_ans, tolerance, qotd_sheet.version)
+            self.qotds[num] = scores
+            for user in scores.attempts:
+                self._user_qotds.setdefault(user, set()).add(num)
+            if num != self.live:
+                self._fixed = None
+        return scores
+
+    def _drop(self, num: int) -> None:
+        scores = self.qotds.pop(num, None)
+        if scores is None:
+            return
+        for user in scores.attempts:
+            nums = self._user_qotds.get(user)
+            if nums is not None:
+                nums.discard(num)
+        self._fixed = None
+
+    def retain(self, nums: set[int]) -> None:
+        """Forget QOTDs that no longer count, e.g. after end of season."""
+        for num in set(self.qotds) - nums:
+            self._drop(num)
+
+    def set_live(self, num: Optional[int]) -> None:
+        if num != self.live:
+            self.live = num
+            self._fixed = None
+
+    def record(self, num: int, user: str, his_ans: str, old_version: int, new_version: int) -> None:
+        """Apply one attempt the caller just appended to the qotd sheet, moving it
+        from old_version to new_version. Anything else makes the next sync regrade."""
+        scores = self.qotds.get(num)
+        if scores is None:
+            return
+        if scores.version != old_version:
+            self._drop(num)
+            return
+        scores.add(user, his_ans)
+        scores.version = new_version
+        self._user_qotds.setdefault(user, set()).add(num)
+        if num != self.live:
+            self._fixed = None
+
+    def _fixed_totals(self) -> dict[str, float]:
+        if self._fixed is None:
+            fixed = dict(self.adjustments)
+            for num in sorted(self.qotds):
+                if num == self.live:
+                    continue
+                scores = self.qotds[num]
+                for user in scores.attempts:
+                    fixed[user] = fixed.get(user, 0.0) + scores.score(user)
+            self._fixed = fixed
+        return self._fixed
+
+    def user_scores(self, user: str) -> list[tuple[str, float, int]]:
+        """(name, score, attempts) rows of /qotd score for user, ending with the total.
+        Cached until the user's adjustments or attempts, or the base of one of their QOTDs change."""
+        nums = sorted(self._user_qotds.get(user, ()))
+        adjustments = self.adjustment_rows.get(user, [])
+        key = (
+            tuple(adjustments),
+            tuple((num, self.qotds[num].stats.base, self.qotds[num].attempts[user]) for num in nums),
+        )
+        cached = self._user_scores.get(user)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        scores: list[tuple[str, float, int]] = [("Point adjustment", offset, 0) for offset in adjustments]
+        for num in nums:
+            score, attempts = self.qotds[num].result(user)
+            scores.append((f"Qotd {num}", score, attempts + 1))
+        scores.append(("Total", sum(k[1] for k in scores), sum(k[2] for k in scores)))
+        self._user_scores[user] = (key, scores)
+        return scores
+
+    def totals(self, banned: set[int]) -> dict[str, float]:
+        """Season total of every user who is not banned."""
+        totals = {user: total for user, total in self._fixed_totals().items() if int(user) not in banned}
+        live = self.qotds.get(self.live) if self.live is not None else None
+        if live is not None:
+            for user in live.attempts:
+                if int(user) not in banned:
+                    totals[user] = totals.get(user, 0.0) + live.score(user)
+        return totals
 
 
 def create_scores_embed(
@@ -16,6 +16,7 @@ from discord.app_commands import CommandOnCooldown
 import config
 from logger import Logger
 import utils.staff_utils as staff_utils
+from services.rwlock import Busy
 
 ChannelType = Union[
     discord.VoiceChannel,
@@ -327,6 +328,17 @@ def requires_permission(level: Permission):
                     f"{func.__name__} on cooldown for {interaction.user}: retry in {cd.retry_after:.1f}s"
                 )
 
+            except Busy as busy:
+                # The service is shedding load, answer now instead of letting the interaction time out.
+                await self.logger.warning(f"{func.__name__} rejected for {interaction.user}: {busy}")
+                try:
+                    if interaction.response.is_done():
+                        await interaction.followup.send(str(busy), ephemeral=True)
+                    else:
+                        await interaction.response.send_message(str(busy), ephemeral=True)
+                except:
+                    pass
+
             except Exception as exc:
                 # log unexpected error
                 tb = traceback.format_exc()